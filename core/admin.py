@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import GenerationCall
+
+
+@admin.register(GenerationCall)
+class GenerationCallAdmin(admin.ModelAdmin):
+    list_display = ("started_at", "operation", "kind", "model_name", "latency_ms",
+                    "input_tokens", "output_tokens", "retries", "images", "success")
+    list_filter = ("operation", "kind", "model_name", "success")
+    search_fields = ("error",)
+    date_hierarchy = "started_at"
+    ordering = ("-started_at",)
+    readonly_fields = [f.name for f in GenerationCall._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,200 @@
+# core/caching.py
+
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .routers import primary_reads
+
+
+# -------------------------------------------------------------------------
+# Service-level caching
+# -------------------------------------------------------------------------
+# Keys look like "<namespace>:<model versions>:<args digest>". Every model a
+# cached function depends on carries a version stamp that is bumped once a
+# save/delete commits, so stale entries are never read again and simply
+# expire. Misses are computed on `default`: a lagging replica read cached
+# under the new stamp would outlive the writer's replica pin.
+
+CACHE_ALIAS = getattr(settings, "SERVICE_CACHE_ALIAS", "default")
+LOCK_TIMEOUT = getattr(settings, "SERVICE_CACHE_LOCK_TIMEOUT", 10)
+LOCK_WAIT = 0.05
+LOCAL_LOCK_STRIPES = 64
+
+_MISSING = object()
+# striped so the set of locks stays fixed while keys change with every version
+_local_locks = [threading.Lock() for _ in range(LOCAL_LOCK_STRIPES)]
+_tracked_models = set()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def make_key(namespace, *parts):
+    return ":".join([namespace, *[str(p) for p in parts]])
+
+
+# ---------- model version stamps ----------
+def _version_key(model):
+    return make_key("ver", model._meta.label_lower)
+
+
+def get_model_version(model):
+    cache = get_cache()
+    version = cache.get(_version_key(model))
+    if version is None:
+        # add() so concurrent first readers agree on the initial stamp
+        cache.add(_version_key(model), 1, None)
+        version = cache.get(_version_key(model), 1)
+    return version
+
+
+async def aget_model_version(model):
+    cache = get_cache()
+    version = await cache.aget(_version_key(model))
+    if version is None:
+        await cache.aadd(_version_key(model), 1, None)
+        version = await cache.aget(_version_key(model), 1)
+    return version
+
+
+def bump_model_version(model):
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(model))
+    except ValueError:
+        cache.set(_version_key(model), 2, None)
+
+
+def _on_change(sender, using=None, **kwargs):
+    # inside a transaction, a bump before commit lets readers re-cache the old rows
+    transaction.on_commit(lambda: bump_model_version(sender), using=using)
+
+
+def track_model(model):
+    if model in _tracked_models:
+        return
+    _tracked_models.add(model)
+    uid = f"core_caching_{model._meta.label_lower}"
+    post_save.connect(_on_change, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(_on_change, sender=model, weak=False, dispatch_uid=uid)
+
+
+# ---------- single flight ----------
+def _local_lock(key):
+    return _local_locks[hash(key) % LOCAL_LOCK_STRIPES]
+
+
+def get_or_compute(key, compute, timeout):
+    """
+    Return the cached value for `key`, computing it on a miss. Only one caller
+    computes per key: threads of this process serialize on a local lock and
+    other processes on a cache.add() lock, everybody else waits for the value
+    (up to LOCK_TIMEOUT) instead of stampeding the database.
+    """
+    cache = get_cache()
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _local_lock(key):
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = make_key("lock", key)
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            time.sleep(LOCK_WAIT)
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if time.monotonic() > deadline:
+                # lock holder died or is too slow, compute ourselves
+                break
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+
+_inflight = {}
+
+
+async def aget_or_compute(key, compute, timeout):
+    """
+    Async get_or_compute: concurrent misses in the same event loop await one
+    computation. There is no cross-process lock, waiting on one would hold the
+    caller's concurrency slot.
+    """
+    cache = get_cache()
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    flight_key = (id(asyncio.get_running_loop()), key)
+    task = _inflight.get(flight_key)
+    if task is None:
+        async def run():
+            result = await compute()
+            await cache.aset(key, result, timeout)
+            return result
+
+        task = _inflight[flight_key] = asyncio.ensure_future(run())
+        task.add_done_callback(lambda _: _inflight.pop(flight_key, None))
+    return await asyncio.shield(task)
+
+
+def _digest(args, kwargs):
+    return hashlib.md5(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+
+
+def cached_service(namespace, timeout=60, models=()):
+    """
+    Cache a service function's return value, keyed on its arguments and on the
+    version stamps of `models`. Works on sync and async functions.
+    """
+    def decorator(func):
+        for model in models:
+            track_model(model)
+
+        if iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def awrapper(*args, **kwargs):
+                versions = ".".join([str(await aget_model_version(m)) for m in models])
+                key = make_key(namespace, versions, _digest(args, kwargs))
+
+                async def compute():
+                    with primary_reads():
+                        return await func(*args, **kwargs)
+
+                return await aget_or_compute(key, compute, timeout)
+
+            awrapper.uncached = func
+            return awrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            versions = ".".join(str(get_model_version(m)) for m in models)
+            key = make_key(namespace, versions, _digest(args, kwargs))
+
+            def compute():
+                with primary_reads():
+                    return func(*args, **kwargs)
+
+            return get_or_compute(key, compute, timeout)
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
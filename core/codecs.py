@@ -0,0 +1,49 @@
+# core/codecs.py
+
+import json
+
+try:
+    import msgpack
+except ImportError:  # optional, clients fall back to json
+    msgpack = None
+
+
+# -------------------------------------------------------------------------
+# WebSocket frame codecs
+# -------------------------------------------------------------------------
+# Negotiated per connection with the ?encoding= query parameter. Transport
+# compression (permessage-deflate) is negotiated by the ASGI server itself
+# (e.g. uvicorn --ws websockets), it applies on top of either codec.
+
+class JSONCodec:
+    name = "json"
+    binary = False
+
+    def encode(self, payload):
+        return json.dumps(payload, separators=(",", ":"))
+
+    def decode(self, frame):
+        return json.loads(frame)
+
+
+class MsgPackCodec:
+    name = "msgpack"
+    binary = True
+
+    def encode(self, payload):
+        return msgpack.packb(payload, use_bin_type=True)
+
+    def decode(self, frame):
+        return msgpack.unpackb(frame, raw=False)
+
+
+CODECS = {"json": JSONCodec}
+if msgpack is not None:
+    CODECS["msgpack"] = MsgPackCodec
+
+
+def get_codec(name):
+    """
+    Unknown or unavailable encodings fall back to json.
+    """
+    return CODECS.get((name or "json").lower(), JSONCodec)()
@@ -1,30 +1,127 @@
+import asyncio
 import json
+import logging
+import uuid
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.contenttypes.models import ContentType
-from .models import ChatMessage
+from .models import Agent, ChatMessage
+from .polymorphic import get_content_type
+from .routers import acting_user
+from . import presence
+from .codecs import get_codec
+from . import context, llm
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Read receipts are merged for this long before one UPDATE is issued
+READ_RECEIPT_FLUSH_DELAY = getattr(settings, "READ_RECEIPT_FLUSH_DELAY", 1.0)
+# Batched delivery: events arriving within this window share one frame
+CHAT_BATCH_WINDOW = getattr(settings, "CHAT_BATCH_WINDOW", 0.005)
+CHAT_BATCH_MAX = getattr(settings, "CHAT_BATCH_MAX", 50)
+
+
+def compact_chat_message(event):
+    """
+    A socket belongs to one two-party room, so the sender id alone tells the
+    client who sent the message and who received it.
+    """
+    return {k: v for k, v in event.items() if k not in ("sender", "receiver_id")}
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    """
+    Client frames carry an optional "event" key:
+      message   (default) {"type": "TEXT"|"IMG64", "data": ...}
+      typing    {"is_typing": bool}
+      read      {"up_to": <message id>}   marks the peer's messages up to that id as read
+      heartbeat {}                        keeps presence alive, send every HEARTBEAT_INTERVAL s
+
+    Connection options (query string):
+      encoding=json|msgpack  frame codec, msgpack uses binary frames both ways
+      batch=1                server events are coalesced into {"type": "batch", "events": [...]}
+
+    Clients that pass either option first get a "chat_hello" frame with the
+    settings in effect, and chat_message events without the fields the
+    connection already implies (see compact_chat_message). Plain connections
+    keep the original protocol.
+    """
+    receiver_type = 'user'
+
     async def connect(self):
         if not self.scope["user"] or not self.scope["user"].is_authenticated:
             await self.close()
             return
 
         self.sender = self.scope["user"]
-        self.receiver_id = self.scope["url_route"]["kwargs"]["receiver_id"]
+        self.receiver_id = int(self.scope["url_route"]["kwargs"]["receiver_id"])
         self.room_name = f"chat_{min(self.sender.id, self.receiver_id)}_{max(self.sender.id, self.receiver_id)}"
+        await self.setup_connection()
+
+    async def setup_connection(self):
+        self.read_up_to = 0
+        self.read_flushed = 0
+        self.read_flush_task = None
+
+        params = parse_qs(self.scope["query_string"].decode())
+        self.codec = get_codec(params.get("encoding", [None])[0])
+        self.batch = params.get("batch", ["0"])[0].lower() in ("1", "true")
+        self.batch_buffer = []
+        self.batch_task = None
+        self.compact = "encoding" in params or self.batch
 
         await self.channel_layer.group_add(self.room_name, self.channel_name)
         await self.accept()
+        if self.compact:
+            await self.send_frame({"type": "chat_hello", "encoding": self.codec.name, "batch": self.batch})
+
+        await database_sync_to_async(presence.connect)(self.sender.id, self.channel_name)
+        await self.broadcast_presence(True)
+        if self.receiver_type == 'user':
+            # tell the new socket whether the peer is around
+            peer = await database_sync_to_async(presence.get_presence)([self.receiver_id])
+            await self.send_event({
+                "type": "chat_presence", "user_id": self.receiver_id, **peer[self.receiver_id],
+            })
 
     async def disconnect(self, close_code):
+        if not hasattr(self, "room_name"):
+            return
+        if self.read_flush_task:
+            self.read_flush_task.cancel()
+        if self.batch_task:
+            self.batch_task.cancel()
+        await self.flush_read_receipts()
+        if await database_sync_to_async(presence.disconnect)(self.sender.id, self.channel_name):
+            await self.broadcast_presence(False)
         await self.channel_layer.group_discard(self.room_name, self.channel_name)
 
     async def receive(self, text_data=None, bytes_data=None):
-        data = json.loads(text_data)
+        data = self.codec.decode(bytes_data) if bytes_data is not None else json.loads(text_data)
+        event = data.get("event", "message")
+
+        if event == "typing":
+            await self.channel_layer.group_send(self.room_name, {
+                "type": "chat_typing",
+                "user_id": self.sender.id,
+                "is_typing": bool(data.get("is_typing", True)),
+            })
+        elif event == "read":
+            try:
+                up_to = int(data["up_to"])
+            except (KeyError, TypeError, ValueError):
+                # malformed receipt, drop the frame rather than the socket
+                return
+            await self.mark_read(up_to)
+        elif event == "heartbeat":
+            await database_sync_to_async(presence.heartbeat)(self.sender.id)
+        else:
+            await self.receive_message(data)
+
+    async def receive_message(self, data):
         msg_type = data.get("type", "TEXT")
         msg_data = data.get("data")
 
@@ -38,6 +135,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 "type": "chat_message",
                 "id": message.id,
                 "sender": self.sender.username,
+                "sender_id": self.sender.id,
                 "receiver_id": self.receiver_id,
                 "msg_type": msg_type,
                 "data": msg_data,
@@ -46,19 +144,218 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps(event))
+        if self.compact:
+            event = compact_chat_message(event)
+        else:
+            event = {k: v for k, v in event.items() if k != "sender_id"}
+        await self.send_event(event)
+
+    async def chat_typing(self, event):
+        if event["user_id"] != self.sender.id:
+            await self.send_event(event)
+
+    async def chat_read(self, event):
+        await self.send_event(event)
+
+    async def chat_presence(self, event):
+        if event["user_id"] != self.sender.id:
+            await self.send_event(event)
+
+    async def broadcast_presence(self, online):
+        await self.channel_layer.group_send(self.room_name, {
+            "type": "chat_presence",
+            "user_id": self.sender.id,
+            "online": online,
+        })
+
+    # ---------- delivery ----------
+    async def send_event(self, event):
+        if not self.batch:
+            await self.send_frame(event)
+            return
+        self.batch_buffer.append(event)
+        if len(self.batch_buffer) >= CHAT_BATCH_MAX:
+            await self.flush_batch()
+        elif self.batch_task is None:
+            self.batch_task = asyncio.create_task(self.delayed_batch_flush())
+
+    async def delayed_batch_flush(self):
+        await asyncio.sleep(CHAT_BATCH_WINDOW)
+        self.batch_task = None
+        await self.flush_batch()
+
+    async def flush_batch(self):
+        if self.batch_task:
+            self.batch_task.cancel()
+            self.batch_task = None
+        events, self.batch_buffer = self.batch_buffer, []
+        if events:
+            await self.send_frame({"type": "batch", "events": events})
+
+    async def send_frame(self, payload):
+        frame = self.codec.encode(payload)
+        if self.codec.binary:
+            await self.send(bytes_data=frame)
+        else:
+            await self.send(text_data=frame)
+
+    # ---------- read receipts ----------
+    async def mark_read(self, up_to):
+        """
+        Receipts are echoed to the room right away but only the highest id is
+        kept, one range UPDATE is issued per flush window.
+        """
+        if up_to <= self.read_up_to:
+            return
+        self.read_up_to = up_to
+        await self.channel_layer.group_send(self.room_name, {
+            "type": "chat_read",
+            "user_id": self.sender.id,
+            "up_to": up_to,
+        })
+        if self.read_flush_task is None:
+            self.read_flush_task = asyncio.create_task(self.delayed_flush())
+
+    async def delayed_flush(self):
+        await asyncio.sleep(READ_RECEIPT_FLUSH_DELAY)
+        self.read_flush_task = None
+        await self.flush_read_receipts()
+
+    async def flush_read_receipts(self):
+        if self.read_up_to > self.read_flushed:
+            up_to = self.read_up_to
+            await self.save_read_up_to(self.receiver_id, self.sender.id, up_to)
+            self.read_flushed = up_to
 
     # ---------- DB ops ----------
     @database_sync_to_async
-    def save_message(self, sender_id, receiver_id, msg_type, msg_data):
-        sender_ct = ContentType.objects.get_for_model(User)
-        receiver_ct = ContentType.objects.get_for_model(User)
-
-        return ChatMessage.objects.create(
-            sender_content_type=sender_ct,
-            sender_object_id=sender_id,
-            receiver_content_type=receiver_ct,
-            receiver_object_id=receiver_id,
-            type=msg_type,
-            data=msg_data,
+    def save_message(self, sender_id, receiver_id, msg_type, msg_data, sender_type='user', receiver_type=None):
+        sender_ct = get_content_type(sender_type)
+        receiver_ct = get_content_type(receiver_type or self.receiver_type)
+
+        with acting_user(self.sender.id):
+            return ChatMessage.objects.create(
+                sender_content_type=sender_ct,
+                sender_object_id=sender_id,
+                receiver_content_type=receiver_ct,
+                receiver_object_id=receiver_id,
+                type=msg_type,
+                data=msg_data,
+            )
+
+    @database_sync_to_async
+    def save_read_up_to(self, sender_id, reader_id, up_to):
+        sender_ct = get_content_type(self.receiver_type)
+        user_ct = get_content_type('user')
+
+        with acting_user(reader_id):
+            return ChatMessage.objects.filter(
+                sender_content_type=sender_ct,
+                sender_object_id=sender_id,
+                receiver_content_type=user_ct,
+                receiver_object_id=reader_id,
+                id__lte=up_to,
+                is_read=False,
+            ).update(is_read=True)
+
+
+class AgentChatConsumer(ChatConsumer):
+    """
+    User <-> Agent chat. Each user message triggers an LLM reply that is
+    streamed to the socket as "agent_token" events and persisted once as a
+    ChatMessage when complete ("agent_message"). One reply runs per socket:
+    text messages sent while it streams are rejected with "agent_reply_pending".
+    """
+    receiver_type = 'agent'
+
+    async def connect(self):
+        if not self.scope["user"] or not self.scope["user"].is_authenticated:
+            await self.close()
+            return
+
+        self.sender = self.scope["user"]
+        self.receiver_id = int(self.scope["url_route"]["kwargs"]["agent_id"])
+        self.agent = await self.get_agent(self.receiver_id)
+        if self.agent is None:
+            await self.close()
+            return
+        self.room_name = f"agentchat_{self.sender.id}_{self.receiver_id}"
+        self.reply_task = None
+        await self.setup_connection()
+
+    async def disconnect(self, close_code):
+        if getattr(self, "reply_task", None):
+            self.reply_task.cancel()
+        await super().disconnect(close_code)
+
+    async def receive_message(self, data):
+        is_text = data.get("type", "TEXT") == ChatMessage.MessageType.TEXT
+        if is_text and self.reply_task is not None:
+            await self.send_event({"type": "agent_reply_pending", "agent_id": self.receiver_id})
+            return
+        await super().receive_message(data)
+        if is_text:
+            # reply in the background so typing/read events keep flowing
+            self.reply_task = asyncio.create_task(self.reply())
+            self.reply_task.add_done_callback(self.reply_done)
+
+    def reply_done(self, task):
+        if self.reply_task is task:
+            self.reply_task = None
+
+    async def reply(self):
+        slot = llm.agent_slot(self.receiver_id)
+        if slot.locked():
+            await self.send_event({"type": "agent_busy", "agent_id": self.receiver_id})
+
+        async with slot:
+            summary, history = await database_sync_to_async(context.get_context)(self.sender.id, self.receiver_id)
+            messages = llm.build_messages(self.agent, history, summary)
+            reply_id = uuid.uuid4().hex
+            chunks = []
+            try:
+                async for chunk in llm.get_chat_model().astream(messages):
+                    if not chunk.content:
+                        continue
+                    chunks.append(chunk.content)
+                    await self.send_event({"type": "agent_token", "reply_id": reply_id, "token": chunk.content})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self.send_event({"type": "agent_error", "reply_id": reply_id, "error": str(e)})
+                return
+
+        text = "".join(chunks)
+        message = await self.save_message(
+            self.receiver_id, self.sender.id, ChatMessage.MessageType.TEXT, text,
+            sender_type='agent', receiver_type='user',
         )
+        await self.channel_layer.group_send(self.room_name, {
+            "type": "agent_message",
+            "reply_id": reply_id,
+            "id": message.id,
+            "agent_id": self.receiver_id,
+            "data": text,
+            "created_at": message.created_at.isoformat(),
+        })
+        await self.update_summary()
+
+    async def update_summary(self):
+        pending = await database_sync_to_async(context.pending_summary_batch)(self.sender.id, self.receiver_id)
+        if pending is None:
+            return
+        state, up_to, history = pending
+        try:
+            summary = await context.summarize(self.agent, state.summary, history)
+        except Exception as e:
+            logger.warning("Error summarizing conversation %s: %s", state.pk, e)
+            return
+        await database_sync_to_async(context.save_summary)(state, summary, up_to)
+
+    async def agent_message(self, event):
+        await self.send_event(event)
+
+    # ---------- DB ops ----------
+    @database_sync_to_async
+    def get_agent(self, agent_id):
+        return Agent.objects.filter(id=agent_id).first()
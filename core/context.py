@@ -0,0 +1,96 @@
+# core/context.py
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from .models import ChatMessage, ConversationSummary
+from .polymorphic import get_content_type
+from . import llm
+
+
+# -------------------------------------------------------------------------
+# Agent chat context window
+# -------------------------------------------------------------------------
+# The prompt for each turn is: persona + cached summary + every message
+# after the summary watermark. Once CONTEXT_WINDOW + SUMMARY_BATCH messages
+# sit after the watermark, the oldest SUMMARY_BATCH are folded into the
+# summary and the watermark moves forward, so every message is either in the
+# summary or in the prompt and the prompt keeps at least CONTEXT_WINDOW
+# verbatim messages. Every query is bounded by the watermark and a LIMIT.
+
+CONTEXT_WINDOW = getattr(settings, "AGENT_CHAT_HISTORY", 20)
+SUMMARY_BATCH = getattr(settings, "AGENT_CHAT_SUMMARY_BATCH", 20)
+MESSAGE_MAX_CHARS = getattr(settings, "AGENT_CHAT_MESSAGE_MAX_CHARS", 2000)
+SUMMARY_MAX_WORDS = getattr(settings, "AGENT_CHAT_SUMMARY_MAX_WORDS", 250)
+
+
+def _conversation(user_id, agent_id):
+    user_ct = get_content_type("user")
+    agent_ct = get_content_type("agent")
+    return ChatMessage.objects.filter(
+        Q(sender_content_type=user_ct, sender_object_id=user_id,
+          receiver_content_type=agent_ct, receiver_object_id=agent_id)
+        | Q(sender_content_type=agent_ct, sender_object_id=agent_id,
+            receiver_content_type=user_ct, receiver_object_id=user_id),
+        type=ChatMessage.MessageType.TEXT,
+    ), agent_ct
+
+
+def _as_history(rows, agent_ct):
+    return [(ct_id == agent_ct.id, text[:MESSAGE_MAX_CHARS]) for _, ct_id, text in rows]
+
+
+def get_context(user_id, agent_id):
+    """
+    Returns (summary, history) where history is a list of (is_agent, text), oldest first.
+    History is everything after the watermark, at most CONTEXT_WINDOW + SUMMARY_BATCH
+    messages (more are only pending while a summary is late or failed).
+    """
+    state = ConversationSummary.objects.filter(user_id=user_id, agent_id=agent_id) \
+                                       .values_list("summary", "summarized_up_to").first()
+    summary, watermark = state or ("", 0)
+    qs, agent_ct = _conversation(user_id, agent_id)
+    rows = list(qs.filter(id__gt=watermark)
+                  .order_by("-id")
+                  .values_list("id", "sender_content_type_id", "data")[:CONTEXT_WINDOW + SUMMARY_BATCH])
+    return summary, _as_history(reversed(rows), agent_ct)
+
+
+def pending_summary_batch(user_id, agent_id):
+    """
+    The oldest SUMMARY_BATCH unsummarized messages when the backlog after the
+    watermark has outgrown the window, else None.
+    """
+    state, _ = ConversationSummary.objects.get_or_create(user_id=user_id, agent_id=agent_id)
+    qs, agent_ct = _conversation(user_id, agent_id)
+    qs = qs.filter(id__gt=state.summarized_up_to).order_by("id")
+    if not qs.values_list("id")[CONTEXT_WINDOW + SUMMARY_BATCH - 1:CONTEXT_WINDOW + SUMMARY_BATCH].exists():
+        return None
+    rows = list(qs.values_list("id", "sender_content_type_id", "data")[:SUMMARY_BATCH])
+    return state, rows[-1][0], _as_history(rows, agent_ct)
+
+
+def save_summary(state, summary, up_to):
+    """
+    Optimistic write: a concurrent summarizer that already moved the
+    watermark wins and this result is dropped.
+    """
+    return ConversationSummary.objects.filter(
+        pk=state.pk, summarized_up_to=state.summarized_up_to,
+    ).update(summary=summary, summarized_up_to=up_to, updated_at=timezone.now())
+
+
+async def summarize(agent, previous, history):
+    transcript = "\n".join(f"{agent.name if is_agent else 'User'}: {text}" for is_agent, text in history)
+    messages = [
+        SystemMessage(content=(
+            f"You maintain a running summary of a conversation between a user and {agent.name}. "
+            f"Merge the new messages into the existing summary. Keep facts, preferences and open "
+            f"questions. Answer with the updated summary only, at most {SUMMARY_MAX_WORDS} words."
+        )),
+        HumanMessage(content=f"Existing summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}"),
+    ]
+    result = await llm.get_chat_model("chat_summary").ainvoke(messages)
+    return result.content
@@ -1,6 +1,6 @@
+import asyncio
 import base64
 import getpass
-import io
 import os
 import numpy as np
 import pydantic
@@ -9,10 +9,12 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chat_models import init_chat_model
 from langchain_google_vertexai.vision_models import VertexAIImageGeneratorChat
-from PIL import Image
 from langchain_core.messages import AIMessage, HumanMessage
-from core.models import Post, PostImage
-from data import agent_categories_with_subcategories
+from core.models import GenerationCall, Post, PostImage
+from core.data import agent_categories_with_subcategories
+from core import planner
+from core.telemetry import TelemetryHandler, flush as flush_telemetry
+from django.conf import settings
 from django.core.files.base import ContentFile
 
 
@@ -51,90 +53,107 @@ def check_credentials():
 
 
 class InitialPost(pydantic.BaseModel):
-    title = pydantic.Field(description="the title of the post")
-    text_content = pydantic.Field(description= "the post text content")
+    title: str = pydantic.Field(description="the title of the post")
+    text_content: str = pydantic.Field(description= "the post text content")
 
-def post_std_agent_job():
-    check_credentials()
 
-    # Upload for 4 random agents
-    agent_field_choices = [np.random.randint(0, len(agent_categories)) for _ in range(4)] 
-    agent_fields = [agent_categories[el] for el in agent_field_choices]
-    
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.8,       
-    )
-    generator = VertexAIImageGeneratorChat(
-        number_of_results=3, 
-        model_name="imagen-4.0-generate-001"
-    )           
-    
-    for i in range(4):
-        # Generate initial post
-        parser = PydanticOutputParser(pydantic_object=InitialPost)
-        
-        # Prompt
-        prompt = ChatPromptTemplate.from_messages([
-            (
-                "system",
-                f"You are an agent specialized in the {agent_fields[i]} field. \n{{format_instructions}}",
-            ),
-            ("human", "{query}"),
-        ]).partial(format_instructions=parser.get_format_instructions())
-
-        query = "Generate an attractive eye catching post about this using a generalist response style"
-        chain = prompt | llm | parser
-        result = chain.invoke({"query": query})
+# Agents generated per planner batch, model calls in flight, batches per run
+POST_BATCH_SIZE = getattr(settings, "AGENT_POST_BATCH_SIZE", 50)
+POST_PARALLELISM = getattr(settings, "AGENT_POST_PARALLELISM", 4)
+POST_MAX_BATCHES = getattr(settings, "AGENT_POST_MAX_BATCHES", 10)
+
 
+async def generate_post(agent, llm, generator, semaphore):
+    parser = PydanticOutputParser(pydantic_object=InitialPost)
+
+    # Prompt
+    prompt = ChatPromptTemplate.from_messages([
+        (
+            "system",
+            f"You are {agent.name}, an agent specialized in the {agent.field} field "
+            f"({agent.sub_field}). \n{{format_instructions}}",
+        ),
+        ("human", "{query}"),
+    ]).partial(format_instructions=parser.get_format_instructions())
+
+    query = (f"Generate an attractive eye catching post about {agent.sub_field or agent.field} "
+             f"using a {agent.agent_style.lower()} response style")
+    chain = prompt | llm | parser
+
+    async with semaphore:
+        result = await chain.ainvoke({"query": query})
+
+        images = []
         # Randomly decide if post should be multimodal (50% chance)
-        multimodal_post = np.random.randint(0, 2)
-            
-        if multimodal_post == 1:
+        if np.random.randint(0, 2) == 1:
             num_of_images_to_generate = np.random.randint(1, 4)
             messages = [HumanMessage(content=[f"Generate {str(num_of_images_to_generate)} images according to this provided post {str(result)}"])]
-            
             try:
-                response = generator.invoke(messages)
-                # To view the generated Image
-                generated_image = response.content[0]
-                # Parse response object to get base64 string for image
-                img_base64 = generated_image["image_url"]["url"].split(",")[-1]
-                img_bytes = base64.b64decode(img_base64)
-                # Convert base64 string to Image
-                img = Image.open(io.BytesIO(base64.decodebytes(bytes(img_base64, "utf-8"))))
-
-                # Create post first
-                post = Post.objects.create(
-                    title=result.title,
-                    text_content=result.text_content,
-                    category=agent_fields[i]
-                )
-
-                # Insert images in PostImages entity sql table
-                # Note: You'll need to save the PIL Image to a file first
-                # This is a placeholder for the actual image saving logic
-                post_image = PostImage.objects.create(
-                    post=post
-                )
-                image_name = f"post_{post.id}_img_{i}.png"
-
-                post_image.image.save(image_name, ContentFile(img_bytes), save=True)
-                
+                response = await generator.ainvoke(messages)
+                for generated_image in response.content[:num_of_images_to_generate]:
+                    # Parse response object to get base64 string for image
+                    img_base64 = generated_image["image_url"]["url"].split(",")[-1]
+                    images.append(base64.b64decode(img_base64))
             except Exception as e:
-                print(f"Error generating images: {e}")
-                # Create text-only post if image generation fails
-                post = Post.objects.create(
-                    title=result.title,
-                    text_content=result.text_content,
-                    category=agent_fields[i]
-                )
-        else:
-            # Directly insert post without images
-            post = Post.objects.create(
-                title=result.title,
-                text_content=result.text_content,
-                category=agent_fields[i]
-            )
-
-        print(f"Created post {i+1}: {result.title}")
\ No newline at end of file
+                print(f"Error generating images for agent {agent.id}: {e}")
+
+    return result, images
+
+
+def save_post(agent, result, images):
+    post = Post.objects.create(
+        agent=agent,
+        title=result.title[:50],
+        text_content=result.text_content,
+        field=agent.field,
+        sub_field=agent.sub_field,
+    )
+    for i, img_bytes in enumerate(images):
+        post_image = PostImage(post=post)
+        post_image.image.save(f"post_{post.id}_img_{i}.png", ContentFile(img_bytes), save=True)
+    return post
+
+
+async def generate_batch(agents):
+    llm = ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        temperature=0.8,
+        callbacks=[TelemetryHandler("post_text", "gemini-2.5-flash")],
+    )
+    generator = VertexAIImageGeneratorChat(
+        number_of_results=3,
+        model_name="imagen-4.0-generate-001",
+        callbacks=[TelemetryHandler("post_image", "imagen-4.0-generate-001", GenerationCall.Kind.IMAGE)],
+    )
+    semaphore = asyncio.Semaphore(POST_PARALLELISM)
+    return await asyncio.gather(
+        *(generate_post(agent, llm, generator, semaphore) for agent in agents),
+        return_exceptions=True,
+    )
+
+
+def post_std_agent_job():
+    """
+    Planner pass: post for every agent whose next_post_at is due, in bounded
+    parallel batches of POST_BATCH_SIZE. Overlapping runs are safe, each due
+    agent is claimed by one run only (see planner.claim_due_agents).
+    """
+    check_credentials()
+    try:
+        planner.schedule_unscheduled()
+        created = 0
+        for _ in range(POST_MAX_BATCHES):
+            agents = planner.claim_due_agents(limit=POST_BATCH_SIZE)
+            if not agents:
+                break
+            results = asyncio.run(generate_batch(agents))
+            for agent, outcome in zip(agents, results):
+                if isinstance(outcome, Exception):
+                    print(f"Error generating post for agent {agent.id}: {outcome}")
+                    continue
+                result, images = outcome
+                save_post(agent, result, images)
+                created += 1
+        print(f"Created {created} posts")
+    finally:
+        flush_telemetry()
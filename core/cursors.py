@@ -0,0 +1,24 @@
+# core/cursors.py
+
+import base64
+
+
+# -------------------------------------------------------------------------
+# Opaque keyset cursors
+# -------------------------------------------------------------------------
+def encode_cursor(*parts):
+    return base64.urlsafe_b64encode("|".join(str(p) for p in parts).encode()).decode()
+
+
+def decode_cursor(cursor, *types):
+    """
+    Decode a cursor into len(types) values, converting each with its type.
+    Raises ValueError on anything malformed.
+    """
+    try:
+        parts = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if len(parts) != len(types):
+            raise ValueError
+        return tuple(t(p) for t, p in zip(types, parts))
+    except Exception:
+        raise ValueError("Invalid cursor")
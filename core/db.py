@@ -0,0 +1,23 @@
+# core/db.py
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+# -------------------------------------------------------------------------
+# SQLite connection tuning
+# -------------------------------------------------------------------------
+@receiver(connection_created, dispatch_uid="core_sqlite_pragmas")
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Apply settings.SQLITE_PRAGMAS to every new SQLite connection.
+    WAL lets feed reads proceed while chat/cron writers hold the write lock.
+    The busy timeout comes from OPTIONS["timeout"] (SQLITE_BUSY_TIMEOUT), a
+    busy_timeout PRAGMA here would silently replace it.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {pragma}={value};")
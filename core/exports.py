@@ -0,0 +1,139 @@
+# core/exports.py
+
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ChatMessage, Post
+from .polymorphic import POLYMORPHIC_TARGETS
+
+
+# -------------------------------------------------------------------------
+# Bulk exports
+# -------------------------------------------------------------------------
+# Full-table exports as NDJSON, one object per line in id order. Rows are
+# read with .iterator(chunk_size=...) (a server-side cursor on PostgreSQL),
+# encoded and yielded one chunk at a time, so memory stays flat whatever the
+# table size. Every export is bounded by the max id seen when it starts and
+# resumes from an id watermark: pass the id of the last line received as
+# `after_id`.
+
+EXPORT_CHUNK_SIZE = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+_encoder = DjangoJSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def _post_record(post):
+    agent = post.agent
+    return {
+        "id": post.id,
+        "title": post.title,
+        "text_content": post.text_content,
+        "field": post.field,
+        "sub_field": post.sub_field,
+        "created_at": post.created_at,
+        "agent": {
+            "id": agent.id,
+            "name": agent.name,
+            "field": agent.field,
+            "sub_field": agent.sub_field,
+            "agent_style": agent.agent_style,
+        } if agent else None,
+        "images": [{"id": i.id, "image": i.image.name, "uploaded_at": i.uploaded_at} for i in post.images.all()],
+    }
+
+
+def _type_names():
+    """
+    content_type_id -> public type name, one query for all registered targets.
+    """
+    names = {(app_label, model): name for name, (app_label, model) in POLYMORPHIC_TARGETS.items()}
+    return {ct.id: names.get((ct.app_label, ct.model), ct.model)
+            for ct in ContentType.objects.filter(app_label__in={a for a, _ in names})}
+
+
+def _chat_record(message, type_names):
+    return {
+        "id": message.id,
+        "sender": {"type": type_names.get(message.sender_content_type_id), "id": message.sender_object_id},
+        "receiver": {"type": type_names.get(message.receiver_content_type_id), "id": message.receiver_object_id},
+        "type": message.type,
+        "data": message.data,
+        "is_read": message.is_read,
+        "created_at": message.created_at,
+    }
+
+
+def _posts(after_id, until_id, chunk_size):
+    qs = (Post.objects.filter(id__gt=after_id, id__lte=until_id)
+          .select_related("agent").prefetch_related("images").order_by("id"))
+    for post in qs.iterator(chunk_size=chunk_size):
+        yield post.id, _post_record(post)
+
+
+def _chat_messages(after_id, until_id, chunk_size):
+    type_names = _type_names()
+    qs = ChatMessage.objects.filter(id__gt=after_id, id__lte=until_id).order_by("id")
+    for message in qs.iterator(chunk_size=chunk_size):
+        yield message.id, _chat_record(message, type_names)
+
+
+EXPORTS = {
+    "posts": (Post, _posts),
+    "chats": (ChatMessage, _chat_messages),
+}
+
+
+def export_bounds(name, after_id=0):
+    """
+    (after_id, until_id) for an export starting now.
+    """
+    model, _ = EXPORTS[name]
+    until_id = model.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    return int(after_id), until_id
+
+
+def iter_ndjson(name, after_id, until_id, chunk_size=None):
+    """
+    Yield (last_id, bytes) per chunk of `chunk_size` NDJSON lines.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    _, rows = EXPORTS[name]
+    lines, last_id = [], after_id
+    for last_id, record in rows(after_id, until_id, chunk_size):
+        lines.append(_encoder.encode(record))
+        if len(lines) >= chunk_size:
+            yield last_id, ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield last_id, ("\n".join(lines) + "\n").encode()
+
+
+def gzip_chunks(chunks):
+    """
+    Compress (last_id, bytes) chunks into one gzip stream, flushing after each
+    chunk so the consumer can decode everything received so far.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for last_id, data in chunks:
+        yield last_id, compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield None, compressor.flush()
+
+
+async def astream(chunks):
+    """
+    Serve a sync chunk generator to an ASGI response one chunk at a time.
+    Django would otherwise read the whole sync iterator into memory first.
+    The generator stays on the request's thread-sensitive executor, so the DB
+    cursor keeps its connection.
+    """
+    done = object()
+    get_next = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await get_next(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
@@ -0,0 +1,22 @@
+# core/hashers.py
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+# -------------------------------------------------------------------------
+# Password hashers
+# -------------------------------------------------------------------------
+# Cost parameters come from settings so a deployment can trade login CPU for
+# hash strength. Hashes keep their algorithm name, so changing a parameter
+# (or the preferred hasher in PASSWORD_HASHERS) rehashes each user's password
+# transparently on their next successful login.
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = getattr(settings, "ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+    memory_cost = getattr(settings, "ARGON2_MEMORY_COST", Argon2PasswordHasher.memory_cost)
+    parallelism = getattr(settings, "ARGON2_PARALLELISM", Argon2PasswordHasher.parallelism)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = getattr(settings, "PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,162 @@
+# core/identity.py
+
+import asyncio
+import hashlib
+import weakref
+
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+# -------------------------------------------------------------------------
+# Social identity providers
+# -------------------------------------------------------------------------
+# A provider turns an OAuth access token into an Identity by calling its
+# userinfo endpoint. Providers are configured in SOCIAL_PROVIDERS
+# (name -> {"class": dotted path, **kwargs}) and share pooled HTTP clients
+# with explicit timeouts. Verified identities are cached per token (by hash,
+# the token itself is never stored) until the token expires, or for
+# SOCIAL_IDENTITY_CACHE_TTL when the provider does not report an expiry.
+
+SOCIAL_PROVIDERS = getattr(settings, "SOCIAL_PROVIDERS", {
+    "google": {
+        "class": "core.identity.OAuthProvider",
+        "userinfo_url": "https://www.googleapis.com/oauth2/v3/userinfo",
+    },
+})
+SOCIAL_HTTP_TIMEOUT = getattr(settings, "SOCIAL_HTTP_TIMEOUT", 5.0)
+SOCIAL_HTTP_MAX_CONNECTIONS = getattr(settings, "SOCIAL_HTTP_MAX_CONNECTIONS", 20)
+SOCIAL_IDENTITY_CACHE_TTL = getattr(settings, "SOCIAL_IDENTITY_CACHE_TTL", 300)
+EXPIRY_SKEW = 30
+
+
+class IdentityError(ValueError):
+    pass
+
+
+class Identity:
+    def __init__(self, provider: str, subject: str, email: str, name: str = "", expires_in: int = None):
+        self.provider = provider
+        self.subject = subject
+        self.email = email
+        self.name = name
+        self.expires_in = expires_in
+
+
+# ---------- pooled clients ----------
+def _client_options():
+    return {
+        "timeout": httpx.Timeout(SOCIAL_HTTP_TIMEOUT, connect=min(SOCIAL_HTTP_TIMEOUT, 2.0)),
+        "limits": httpx.Limits(max_connections=SOCIAL_HTTP_MAX_CONNECTIONS,
+                               max_keepalive_connections=SOCIAL_HTTP_MAX_CONNECTIONS),
+    }
+
+
+_sync_client = None
+# AsyncClient connections belong to the loop that opened them, keep one per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = httpx.Client(**_client_options())
+    return _sync_client
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(**_client_options())
+    return client
+
+
+# ---------- providers ----------
+class OAuthProvider:
+    """
+    OpenID Connect style userinfo endpoint: GET with a bearer token, returns
+    sub/email/name (and optionally expires_in).
+    """
+
+    def __init__(self, name, userinfo_url):
+        self.name = name
+        self.userinfo_url = userinfo_url
+
+    def parse(self, data):
+        email = data.get("email")
+        if not email:
+            raise IdentityError(f"{self.name} did not return an email")
+        if data.get("email_verified") is False:
+            raise IdentityError(f"{self.name} email is not verified")
+        expires_in = data.get("expires_in")
+        return Identity(self.name, str(data.get("sub") or email), email, data.get("name") or "",
+                        int(expires_in) if expires_in else None)
+
+    def _check(self, response):
+        if response.status_code in (400, 401, 403):
+            raise IdentityError("Invalid or expired social token")
+        response.raise_for_status()
+        return self.parse(response.json())
+
+    def verify(self, token):
+        try:
+            response = get_client().get(self.userinfo_url, headers={"Authorization": f"Bearer {token}"})
+            return self._check(response)
+        except httpx.HTTPError as e:
+            raise IdentityError(f"Could not verify token with {self.name}") from e
+
+    async def averify(self, token):
+        try:
+            response = await get_async_client().get(self.userinfo_url, headers={"Authorization": f"Bearer {token}"})
+            return self._check(response)
+        except httpx.HTTPError as e:
+            raise IdentityError(f"Could not verify token with {self.name}") from e
+
+
+_providers = {}
+
+
+def get_provider(name):
+    name = name.lower()
+    if name not in _providers:
+        config = SOCIAL_PROVIDERS.get(name)
+        if config is None:
+            raise NotImplementedError("Provider not supported")
+        options = dict(config)
+        _providers[name] = import_string(options.pop("class"))(name, **options)
+    return _providers[name]
+
+
+# ---------- cached verification ----------
+def _cache_key(provider, token):
+    return f"social_identity:{provider}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def _ttl(identity):
+    if identity.expires_in:
+        # stop trusting the token a little before the provider does
+        return max(identity.expires_in - EXPIRY_SKEW, 1)
+    return SOCIAL_IDENTITY_CACHE_TTL
+
+
+def verify(provider_name, token):
+    provider = get_provider(provider_name)
+    key = _cache_key(provider.name, token)
+    identity = cache.get(key)
+    if identity is None:
+        identity = provider.verify(token)
+        cache.set(key, identity, _ttl(identity))
+    return identity
+
+
+async def averify(provider_name, token):
+    provider = get_provider(provider_name)
+    key = _cache_key(provider.name, token)
+    identity = await cache.aget(key)
+    if identity is None:
+        identity = await provider.averify(token)
+        await cache.aset(key, identity, _ttl(identity))
+    return identity
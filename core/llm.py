@@ -0,0 +1,68 @@
+# core/llm.py
+
+import asyncio
+
+from django.conf import settings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from .telemetry import TelemetryHandler
+
+
+# -------------------------------------------------------------------------
+# Chat model
+# -------------------------------------------------------------------------
+# AGENT_CHAT_MODEL = "gemini-2.5-flash" (same provider as core.cron) or
+# "fake" for tests and local development without credentials.
+
+AGENT_CHAT_MODEL = getattr(settings, "AGENT_CHAT_MODEL", "gemini-2.5-flash")
+AGENT_CHAT_TEMPERATURE = getattr(settings, "AGENT_CHAT_TEMPERATURE", 0.7)
+AGENT_CHAT_MAX_CONCURRENCY = getattr(settings, "AGENT_CHAT_MAX_CONCURRENCY", 4)
+FAKE_REPLIES = ["Hello! I'm a local test agent, this reply is streamed token by token."]
+
+
+def get_chat_model(operation="agent_chat"):
+    callbacks = [TelemetryHandler(operation, AGENT_CHAT_MODEL)]
+    if AGENT_CHAT_MODEL == "fake":
+        return FakeListChatModel(responses=FAKE_REPLIES, sleep=0.01, callbacks=callbacks)
+
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(model=AGENT_CHAT_MODEL, temperature=AGENT_CHAT_TEMPERATURE, callbacks=callbacks)
+
+
+def agent_system_prompt(agent):
+    return (
+        f"You are {agent.name}, an agent specialized in the {agent.field} field"
+        f"{f' ({agent.sub_field})' if agent.sub_field else ''}. "
+        f"Answer using a {agent.agent_style.lower()} response style. "
+        f"{agent.description}".strip()
+    )
+
+
+def build_messages(agent, history, summary=""):
+    """
+    history: list of (is_agent, text) tuples, oldest first.
+    summary: digest of the conversation before `history`, if any.
+    """
+    messages = [SystemMessage(content=agent_system_prompt(agent))]
+    if summary:
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    for is_agent, text in history:
+        messages.append(AIMessage(content=text) if is_agent else HumanMessage(content=text))
+    return messages
+
+
+# -------------------------------------------------------------------------
+# Per-agent concurrency cap
+# -------------------------------------------------------------------------
+_agent_slots = {}
+
+
+def agent_slot(agent_id):
+    """
+    Process-wide semaphore bounding concurrent generations for one agent.
+    """
+    if agent_id not in _agent_slots:
+        _agent_slots[agent_id] = asyncio.Semaphore(AGENT_CHAT_MAX_CONCURRENCY)
+    return _agent_slots[agent_id]
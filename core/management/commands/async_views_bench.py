@@ -0,0 +1,100 @@
+import asyncio
+import json
+import time
+
+import httpx
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import ChatMessage, Comment, Post
+from core.services import generate_tokens_for_user
+
+from .perf_bench import summarize
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ("Compare requests/sec of the sync DRF read views with their async/ counterparts under the "
+            "same ASGI application, in-process or against a running server (--base-url).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="requests per endpoint and mode")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--base-url", help="e.g. http://127.0.0.1:8000 (default: in-process ASGI app)")
+        parser.add_argument("--api-prefix", default="/api")
+        parser.add_argument("--only", nargs="*", help="endpoint names to run")
+        parser.add_argument("--output", help="write the JSON report to this file")
+        parser.add_argument("--random-seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        rng = np.random.default_rng(opts["random_seed"])
+        pair = ChatMessage.objects.values_list("sender_object_id", "receiver_object_id").first()
+        post_id = Comment.objects.values_list("post_id", flat=True).first() or \
+            Post.objects.values_list("id", flat=True).first()
+        if pair is None or post_id is None:
+            raise CommandError("Needs posts and chat messages, run generate_data first")
+        user = User.objects.get(id=pair[0])
+        headers = {"Authorization": f"Bearer {generate_tokens_for_user(user).access_token}"}
+
+        prefix = opts["api_prefix"].rstrip("/")
+        endpoints = {
+            "posts": lambda: f"/posts/?page_index={int(rng.integers(1, 20))}",
+            "post_comments": lambda: f"/posts/{post_id}/comments/",
+            "discussions": lambda: f"/chats/{user.id}/",
+            "discussion_chats": lambda: f"/chats/{pair[0]}/{pair[1]}/",
+        }
+        results = asyncio.run(self.run_all(endpoints, prefix, headers, opts))
+        output = json.dumps(results, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    async def run_all(self, endpoints, prefix, headers, opts):
+        if opts["base_url"]:
+            client = httpx.AsyncClient(base_url=opts["base_url"], headers=headers, timeout=30)
+        else:
+            transport = httpx.ASGITransport(app=get_asgi_application())
+            client = httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=30)
+
+        results = {}
+        async with client:
+            for name, path in endpoints.items():
+                if opts["only"] and name not in opts["only"]:
+                    continue
+                self.stderr.write(f"running {name} ...")
+                results[name] = {
+                    "sync": await self.run(client, lambda: prefix + path(), opts),
+                    "async": await self.run(client, lambda: f"{prefix}/async" + path(), opts),
+                }
+                sync_rps, async_rps = results[name]["sync"]["rps"], results[name]["async"]["rps"]
+                results[name]["speedup"] = round(async_rps / sync_rps, 2) if sync_rps else None
+        return results
+
+    async def run(self, client, make_path, opts):
+        semaphore = asyncio.Semaphore(opts["concurrency"])
+        latencies, statuses = [], {}
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(make_path())
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        # warm caches and connections before timing
+        await asyncio.gather(*(one() for _ in range(opts["concurrency"])))
+        latencies.clear()
+        statuses.clear()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(opts["requests"])))
+        elapsed = time.perf_counter() - start
+        report = summarize(latencies)
+        # summarize() derives rps from serial latency, use wall clock under concurrency
+        report["rps"] = round(len(latencies) / elapsed, 1)
+        report["status_codes"] = statuses
+        return report
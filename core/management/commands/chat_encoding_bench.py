@@ -0,0 +1,83 @@
+import base64
+import json
+import os
+import time
+import zlib
+
+from django.core.management.base import BaseCommand
+
+from core.codecs import CODECS
+from core.consumers import compact_chat_message
+
+
+class Command(BaseCommand):
+    help = ("Compare bytes-on-wire and CPU per chat event for each frame codec, with and "
+            "without batching and with a permessage-deflate style compressor.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=5000)
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument("--image-ratio", type=float, default=0.1,
+                            help="share of IMG64 events carrying a base64 image")
+        parser.add_argument("--image-bytes", type=int, default=20000)
+
+    def handle(self, *args, **opts):
+        events = self.make_events(opts["events"], opts["image_ratio"], opts["image_bytes"])
+        report = []
+        for name, codec_cls in CODECS.items():
+            codec = codec_cls()
+            for batch in (1, opts["batch_size"]):
+                for deflate in (False, True):
+                    report.append(self.measure(codec, events, batch, deflate))
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def make_events(self, n, image_ratio, image_bytes):
+        events = []
+        for i in range(n):
+            is_image = (i % max(int(1 / image_ratio), 1) == 0) if image_ratio else False
+            events.append({
+                "type": "chat_message",
+                "id": 100000 + i,
+                "sender": f"user_{i % 50}",
+                "sender_id": i % 50,
+                "receiver_id": 7,
+                "msg_type": "IMG64" if is_image else "TEXT",
+                # fresh bytes per image so deflate cannot reuse earlier frames
+                "data": base64.b64encode(os.urandom(image_bytes)).decode() if is_image else f"message number {i}, how is it going today?",
+                "created_at": "2025-01-01T12:00:00.000000+00:00",
+            })
+        return events
+
+    def measure(self, codec, events, batch, deflate):
+        # permessage-deflate with context takeover: one compressor per connection,
+        # each frame ends with a sync flush
+        compressor = zlib.compressobj(wbits=-15) if deflate else None
+        # like the consumer: clients that opt into msgpack or batching get compact events
+        compact = codec.name != "json" or batch > 1
+        if compact:
+            events = [compact_chat_message(e) for e in events]
+        else:
+            events = [{k: v for k, v in e.items() if k != "sender_id"} for e in events]
+        frames = 0
+        wire_bytes = 0
+        start = time.process_time()
+        for i in range(0, len(events), batch):
+            chunk = events[i:i + batch]
+            payload = chunk[0] if batch == 1 else {"type": "batch", "events": chunk}
+            frame = codec.encode(payload)
+            if isinstance(frame, str):
+                frame = frame.encode()
+            if compressor:
+                frame = compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            frames += 1
+            wire_bytes += len(frame)
+        cpu = time.process_time() - start
+        return {
+            "codec": codec.name,
+            "batch": batch,
+            "compact": compact,
+            "deflate": deflate,
+            "frames": frames,
+            "bytes_per_event": round(wire_bytes / len(events), 1),
+            "cpu_us_per_event": round(cpu / len(events) * 1e6, 2),
+        }
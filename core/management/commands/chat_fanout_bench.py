@@ -0,0 +1,83 @@
+import asyncio
+import json
+import time
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ("Fan-out benchmark of the configured channel layer: N rooms x M sockets, "
+            "K chat_message events per room, reports messages/sec.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=50)
+        parser.add_argument("--sockets", type=int, default=2, help="sockets per room")
+        parser.add_argument("--messages", type=int, default=100, help="messages per room")
+        parser.add_argument("--payload-bytes", type=int, default=200)
+        parser.add_argument("--timeout", type=float, default=60)
+
+    def handle(self, *args, **opts):
+        report = asyncio.run(self.run(**opts))
+        self.stdout.write(json.dumps(report, indent=2))
+
+    async def run(self, rooms, sockets, messages, payload_bytes, timeout, **kwargs):
+        layer = get_channel_layer()
+        groups = {}
+        for r in range(rooms):
+            room = f"bench_{r}"
+            groups[room] = [await layer.new_channel() for _ in range(sockets)]
+            for channel in groups[room]:
+                await layer.group_add(room, channel)
+
+        received = 0
+
+        async def consume(channel):
+            nonlocal received
+            for _ in range(messages):
+                await layer.receive(channel)
+                received += 1
+
+        event = {
+            "type": "chat_message",
+            "id": 0,
+            "sender": "bench_user",
+            "receiver_id": 0,
+            "msg_type": "TEXT",
+            "data": "x" * payload_bytes,
+            "created_at": "2025-01-01T00:00:00+00:00",
+        }
+
+        async def produce(room):
+            for i in range(messages):
+                await layer.group_send(room, {**event, "id": i})
+
+        consumers = [asyncio.create_task(consume(c)) for channels in groups.values() for c in channels]
+        start = time.perf_counter()
+        await asyncio.gather(*(produce(room) for room in groups))
+        sent_elapsed = time.perf_counter() - start
+        try:
+            await asyncio.wait_for(asyncio.gather(*consumers), timeout)
+        except asyncio.TimeoutError:
+            for task in consumers:
+                task.cancel()
+        elapsed = time.perf_counter() - start
+
+        for room, channels in groups.items():
+            for channel in channels:
+                await layer.group_discard(room, channel)
+
+        expected = rooms * sockets * messages
+        return {
+            "layer": type(layer).__name__,
+            "rooms": rooms,
+            "sockets_per_room": sockets,
+            "messages_per_room": messages,
+            "frame_bytes": len(json.dumps(event)),
+            "sent": rooms * messages,
+            "sent_per_sec": round(rooms * messages / sent_elapsed, 1),
+            "delivered": received,
+            "lost": expected - received,
+            "delivered_per_sec": round(received / elapsed, 1),
+            "elapsed_sec": round(elapsed, 3),
+        }
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+
+from core.models import ChatMessage, Post
+from core.polymorphic import get_content_type
+
+
+class Command(BaseCommand):
+    help = "Concurrency stress test: chat inserts racing feed reads against the configured database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--users", type=int, default=50, help="user id range used for chat messages")
+
+    def handle(self, *args, **opts):
+        user_ct = get_content_type("user")
+        deadline = time.perf_counter() + opts["seconds"]
+        stats = {"write": [], "read": [], "locked": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def record(kind, elapsed):
+            with lock:
+                stats[kind].append(elapsed)
+
+        def fail(exc):
+            with lock:
+                if "locked" in str(exc):
+                    stats["locked"] += 1
+                else:
+                    stats["errors"] += 1
+
+        def writer(seed):
+            rng = np.random.default_rng(seed)
+            try:
+                while time.perf_counter() < deadline:
+                    sender, receiver = rng.integers(1, opts["users"] + 1, 2)
+                    start = time.perf_counter()
+                    try:
+                        ChatMessage.objects.create(
+                            sender_content_type=user_ct, sender_object_id=int(sender),
+                            receiver_content_type=user_ct, receiver_object_id=int(receiver),
+                            data="stress",
+                        )
+                        record("write", time.perf_counter() - start)
+                    except OperationalError as e:
+                        fail(e)
+            finally:
+                connection.close()
+
+        def reader(seed):
+            rng = np.random.default_rng(seed)
+            try:
+                while time.perf_counter() < deadline:
+                    user_id = int(rng.integers(1, opts["users"] + 1))
+                    start = time.perf_counter()
+                    try:
+                        list(Post.objects.select_related("agent").order_by("-created_at")[:20])
+                        list(ChatMessage.objects.filter(
+                            receiver_content_type=user_ct, receiver_object_id=user_id,
+                        ).order_by("-created_at")[:50])
+                        record("read", time.perf_counter() - start)
+                    except OperationalError as e:
+                        fail(e)
+            finally:
+                connection.close()
+
+        close_old_connections()
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(opts["writers"])]
+        threads += [threading.Thread(target=reader, args=(1000 + i,)) for i in range(opts["readers"])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        report = {"vendor": connection.vendor, "seconds": opts["seconds"],
+                  "locked": stats["locked"], "errors": stats["errors"]}
+        for kind in ("write", "read"):
+            samples = np.array(stats[kind]) * 1000
+            report[kind] = {
+                "ops": len(samples),
+                "ops_per_sec": round(len(samples) / opts["seconds"], 1),
+                "p50_ms": round(float(np.percentile(samples, 50)), 2) if len(samples) else None,
+                "p99_ms": round(float(np.percentile(samples, 99)), 2) if len(samples) else None,
+            }
+        self.stdout.write(json.dumps(report, indent=2))
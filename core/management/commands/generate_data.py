@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import seeding
+
+
+class Command(BaseCommand):
+    help = ("Generate a large synthetic dataset (users, agents, posts with images, follows, likes, "
+            "comments, chat messages) with vectorized sampling and bulk inserts.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--agents", type=int, default=1000)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--images-per-post", type=float, default=1.0, help="mean images per post")
+        parser.add_argument("--follows", type=int, default=200000)
+        parser.add_argument("--likes", type=int, default=500000)
+        parser.add_argument("--comments", type=int, default=200000)
+        parser.add_argument("--messages", type=int, default=1000000)
+        parser.add_argument("--days", type=int, default=30, help="spread creation dates over this many days")
+        parser.add_argument("--prefix", default="user", help="username prefix")
+        parser.add_argument("--chunk-size", type=int, default=20000)
+        parser.add_argument("--raw", action="store_true",
+                            help="insert through cursor.executemany instead of bulk_create (SQLite only)")
+        parser.add_argument("--random-seed", type=int, default=None)
+
+    def handle(self, *args, **opts):
+        if opts["raw"] and connection.vendor != "sqlite":
+            raise CommandError("--raw is only supported on SQLite")
+        seeding.CHUNK_SIZE = opts["chunk_size"]
+        rng = np.random.default_rng(opts["random_seed"])
+        raw, days = opts["raw"], opts["days"]
+        self.total_rows, self.total_seconds = 0, 0.0
+
+        user_ids = self.step("users", seeding.seed_users, opts["users"], prefix=opts["prefix"], raw=raw)
+        agent_ids = self.step("agents", seeding.seed_agents, opts["agents"], rng, raw=raw)
+        if not len(user_ids) or not len(agent_ids):
+            raise CommandError("--users and --agents must be positive")
+        post_ids = self.step("posts", seeding.seed_posts, opts["posts"], agent_ids, rng, days=days, raw=raw)
+        if len(post_ids):
+            self.step("post images", seeding.seed_post_images, post_ids, rng,
+                      mean_images=opts["images_per_post"], raw=raw)
+            self.step("likes", seeding.seed_likes, opts["likes"], user_ids, post_ids, rng, days=days, raw=raw)
+            self.step("comments", seeding.seed_comments, opts["comments"], user_ids, post_ids, rng,
+                      days=days, raw=raw)
+        self.step("follows", seeding.seed_follows, opts["follows"], user_ids, agent_ids, rng, days=days, raw=raw)
+        self.step("chat messages", seeding.seed_chat_messages, opts["messages"], user_ids, rng, days=days, raw=raw)
+
+        rate = self.total_rows / self.total_seconds if self.total_seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.total_rows} rows in {self.total_seconds:.1f}s ({rate * 60:,.0f} rows/min)"
+        ))
+
+    def step(self, label, loader, *args, **kwargs):
+        start = time.perf_counter()
+        ids = loader(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        self.total_rows += len(ids)
+        self.total_seconds += elapsed
+        self.stdout.write(f"{label:>14}: {len(ids):>10} rows in {elapsed:6.1f}s")
+        return ids
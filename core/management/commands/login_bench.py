@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, get_hashers, identify_hasher, make_password
+from django.core.management.base import BaseCommand
+
+from core import seeding, services
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ("Measure password verification cost per hasher and signin throughput (sync, and async "
+            "through the auth thread pool) for the configured PASSWORD_HASHER_PROFILE.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--logins", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 4)
+        parser.add_argument("--verifies", type=int, default=20, help="verifications per hasher")
+        parser.add_argument("--legacy-hasher", default=None,
+                            help="seed users with this algorithm (e.g. pbkdf2_sha1) to measure rehash on login")
+        parser.add_argument("--keep", action="store_true", help="keep the benchmark users")
+
+    def handle(self, *args, **opts):
+        report = {
+            "profile": settings.PASSWORD_HASHER_PROFILE,
+            "cpus": os.cpu_count(),
+            "hashers": self.bench_hashers(opts["verifies"]),
+        }
+
+        user_ids = seeding.seed_users(opts["users"], prefix="login")
+        if opts["legacy_hasher"]:
+            legacy = get_hasher(opts["legacy_hasher"])
+            User.objects.filter(id__in=user_ids.tolist()).update(
+                password=legacy.encode(seeding.SEED_PASSWORD, legacy.salt()))
+        usernames = list(User.objects.filter(id__in=user_ids.tolist()).values_list("username", flat=True))
+        try:
+            report["sync"] = self.bench_sync(usernames, opts["logins"])
+            report["async"] = asyncio.run(self.bench_async(usernames, opts["logins"], opts["concurrency"]))
+            preferred = get_hashers()[0].algorithm
+            report["rehashed_to_preferred"] = sum(
+                identify_hasher(p).algorithm == preferred
+                for p in User.objects.filter(id__in=user_ids.tolist()).values_list("password", flat=True)
+            )
+        finally:
+            if not opts["keep"]:
+                User.objects.filter(id__in=user_ids.tolist()).delete()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def bench_hashers(self, n):
+        results = {}
+        for hasher in get_hashers():
+            try:
+                encoded = make_password(seeding.SEED_PASSWORD, hasher=hasher.algorithm)
+            except ValueError as e:
+                # optional library (argon2-cffi, bcrypt) not installed
+                results[hasher.algorithm] = {"skipped": str(e)}
+                continue
+            start = time.perf_counter()
+            for _ in range(n):
+                hasher.verify(seeding.SEED_PASSWORD, encoded)
+            elapsed = time.perf_counter() - start
+            results[hasher.algorithm] = {
+                "verify_ms": round(elapsed / n * 1000, 2),
+                "verifies_per_sec_per_core": round(n / elapsed, 1),
+            }
+        return results
+
+    def bench_sync(self, usernames, n):
+        start = time.perf_counter()
+        for i in range(n):
+            services.signin(usernames[i % len(usernames)], seeding.SEED_PASSWORD)
+        elapsed = time.perf_counter() - start
+        return {"logins": n, "logins_per_sec": round(n / elapsed, 1)}
+
+    async def bench_async(self, usernames, n, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login(i):
+            async with semaphore:
+                await services.asignin(usernames[i % len(usernames)], seeding.SEED_PASSWORD)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(n)))
+        elapsed = time.perf_counter() - start
+        workers = services._auth_executor._max_workers
+        return {
+            "logins": n,
+            "concurrency": concurrency,
+            "workers": workers,
+            "logins_per_sec": round(n / elapsed, 1),
+            "logins_per_sec_per_core": round(n / elapsed / min(workers, concurrency, os.cpu_count() or 1), 1),
+        }
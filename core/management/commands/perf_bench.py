@@ -0,0 +1,227 @@
+import asyncio
+import json
+import subprocess
+import time
+
+import numpy as np
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import seeding
+from core.models import Agent, ChatMessage, Follow
+from core.routing import websocket_urlpatterns
+from core.services import generate_tokens_for_user
+
+User = get_user_model()
+
+
+def summarize(latencies_ms, queries=None):
+    lat = np.array(latencies_ms)
+    report = {
+        "n": len(lat),
+        "p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "p95_ms": round(float(np.percentile(lat, 95)), 2),
+        "p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "mean_ms": round(float(lat.mean()), 2),
+        "rps": round(len(lat) / (lat.sum() / 1000), 1) if lat.sum() else None,
+    }
+    if queries is not None:
+        report["queries_mean"] = round(float(np.mean(queries)), 2)
+        report["queries_max"] = int(np.max(queries))
+    return report
+
+
+class Command(BaseCommand):
+    help = ("Benchmark feed, chat and auth hot paths through the test client and an in-process "
+            "ASGI websocket communicator. Reports p50/p95/p99 and query counts as JSON. "
+            "Run it against a dedicated database (e.g. SQLITE_PATH=bench.sqlite3).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", action="store_true", help="load a dataset before benchmarking")
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--agents", type=int, default=500)
+        parser.add_argument("--posts", type=int, default=50000)
+        parser.add_argument("--follows", type=int, default=50000)
+        parser.add_argument("--messages", type=int, default=100000)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--chat-rooms", type=int, default=20)
+        parser.add_argument("--chat-messages", type=int, default=50, help="messages per room")
+        parser.add_argument("--only", nargs="*", help="benchmark names to run")
+        parser.add_argument("--output", help="write the JSON report to this file")
+        parser.add_argument("--api-prefix", default="/api")
+        parser.add_argument("--random-seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        self.rng = np.random.default_rng(opts["random_seed"])
+        if opts["seed"]:
+            self.seed(opts)
+
+        self.user_ids = np.array(User.objects.values_list("id", flat=True), dtype=np.int64)
+        if not len(self.user_ids):
+            self.stderr.write("No users in the database, run with --seed")
+            return
+        self.prefix = opts["api_prefix"].rstrip("/")
+        self.client = Client()
+        self.tokens = {}
+
+        benches = {
+            "get_posts": self.bench_posts,
+            "get_discussions": self.bench_discussions,
+            "get_discussion_chats": self.bench_discussion_chats,
+            "get_followers": self.bench_followers,
+            "signin": self.bench_signin,
+            "chat_consumer": self.bench_chat,
+        }
+        results = {}
+        for name, bench in benches.items():
+            if opts["only"] and name not in opts["only"]:
+                continue
+            self.stderr.write(f"running {name} ...")
+            results[name] = bench(opts)
+
+        report = {
+            "commit": self.git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "dataset": {
+                "users": User.objects.count(),
+                "agents": Agent.objects.count(),
+                "follows": Follow.objects.count(),
+                "chat_messages": ChatMessage.objects.count(),
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    # ---------- dataset ----------
+    def seed(self, opts):
+        start = time.perf_counter()
+        user_ids = seeding.seed_users(opts["users"], prefix="bench")
+        agent_ids = seeding.seed_agents(opts["agents"], self.rng)
+        seeding.seed_posts(opts["posts"], agent_ids, self.rng)
+        seeding.seed_follows(opts["follows"], user_ids, agent_ids, self.rng)
+        seeding.seed_chat_messages(opts["messages"], user_ids, self.rng)
+        self.stderr.write(f"seeded in {time.perf_counter() - start:.1f}s")
+
+    # ---------- helpers ----------
+    def random_user(self):
+        return int(self.rng.choice(self.user_ids))
+
+    def auth_header(self, user_id):
+        if user_id not in self.tokens:
+            self.tokens[user_id] = generate_tokens_for_user(User.objects.get(id=user_id)).access_token
+        return {"HTTP_AUTHORIZATION": f"Bearer {self.tokens[user_id]}"}
+
+    def run_http(self, opts, make_request):
+        """
+        make_request() -> (method, path, data, headers); returns summary with query counts.
+        """
+        latencies, queries, statuses = [], [], {}
+        for i in range(opts["warmup"] + opts["iterations"]):
+            method, path, data, headers = make_request()
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = getattr(self.client, method)(path, data, **headers)
+                elapsed = (time.perf_counter() - start) * 1000
+            if i < opts["warmup"]:
+                continue
+            latencies.append(elapsed)
+            queries.append(len(ctx.captured_queries))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        report = summarize(latencies, queries)
+        report["status_codes"] = statuses
+        return report
+
+    # ---------- benchmarks ----------
+    def bench_posts(self, opts):
+        def request():
+            uid = self.random_user()
+            page = int(self.rng.integers(1, 20))
+            return "get", f"{self.prefix}/posts/", {"page_index": page, "page_size": 20}, self.auth_header(uid)
+        return self.run_http(opts, request)
+
+    def bench_discussions(self, opts):
+        def request():
+            uid = self.random_user()
+            return "get", f"{self.prefix}/chats/{uid}/", {}, self.auth_header(uid)
+        return self.run_http(opts, request)
+
+    def bench_discussion_chats(self, opts):
+        pairs = list(ChatMessage.objects.values_list("sender_object_id", "receiver_object_id")[:1000])
+
+        def request():
+            sender, receiver = pairs[int(self.rng.integers(0, len(pairs)))]
+            return "get", f"{self.prefix}/chats/{sender}/{receiver}/", {}, self.auth_header(sender)
+        return self.run_http(opts, request)
+
+    def bench_followers(self, opts):
+        def request():
+            uid = self.random_user()
+            return "get", f"{self.prefix}/users/{uid}/followers/", {}, self.auth_header(uid)
+        return self.run_http(opts, request)
+
+    def bench_signin(self, opts):
+        usernames = list(User.objects.filter(username__startswith="bench_").values_list("username", flat=True)[:500])
+
+        def request():
+            username = usernames[int(self.rng.integers(0, len(usernames)))]
+            return "post", f"{self.prefix}/auth/signin/", {"username": username, "password": seeding.SEED_PASSWORD}, {}
+        if not usernames:
+            return {"skipped": "no seeded bench_ users"}
+        return self.run_http(opts, request)
+
+    def bench_chat(self, opts):
+        return asyncio.run(self.chat_rooms(opts["chat_rooms"], opts["chat_messages"]))
+
+    async def chat_rooms(self, rooms, messages):
+        application = URLRouter(websocket_urlpatterns)
+        users = {u.id: u async for u in User.objects.filter(id__in=self.user_ids[:rooms * 2].tolist())}
+        ids = list(users)
+        latencies = []
+
+        async def room(sender, receiver):
+            a = WebsocketCommunicator(application, f"/ws/chat/{receiver.id}/")
+            b = WebsocketCommunicator(application, f"/ws/chat/{sender.id}/")
+            a.scope["user"], b.scope["user"] = sender, receiver
+            await a.connect()
+            await b.connect()
+            await drain(a)
+            await drain(b)
+            for i in range(messages):
+                start = time.perf_counter()
+                await a.send_json_to({"type": "TEXT", "data": f"bench {i}"})
+                while True:
+                    event = await b.receive_json_from(timeout=10)
+                    if event.get("type") == "chat_message":
+                        break
+                latencies.append((time.perf_counter() - start) * 1000)
+            await a.disconnect()
+            await b.disconnect()
+
+        async def drain(communicator):
+            while not await communicator.receive_nothing(timeout=0.05):
+                await communicator.receive_output()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(room(users[ids[i]], users[ids[i + 1]]) for i in range(0, len(ids) - 1, 2)))
+        elapsed = time.perf_counter() - start
+        report = summarize(latencies)
+        report["messages_per_sec"] = round(len(latencies) / elapsed, 1)
+        return report
+
+    def git_commit(self):
+        try:
+            return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        except Exception:
+            return None
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.replies import process_agent_reply_queue
+
+
+class Command(BaseCommand):
+    help = ("Drain the agent comment reply queue. Runs once, or keeps polling with --interval "
+            "when replies must land faster than the per-minute cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0, help="seconds between passes (0 = single pass)")
+
+    def handle(self, *args, **opts):
+        while True:
+            close_old_connections()
+            process_agent_reply_queue()
+            if not opts["interval"]:
+                break
+            time.sleep(opts["interval"])
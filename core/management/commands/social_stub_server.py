@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import identity
+
+
+def make_handler(latency, expires_in):
+    class StubUserInfoHandler(BaseHTTPRequestHandler):
+        """
+        OAuth userinfo stand-in: any bearer token is valid unless it starts
+        with "invalid"; the identity is derived from the token.
+        """
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            token = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+            if not token or token.startswith("invalid"):
+                return self.reply(401, {"error": "invalid_token"})
+            subject = hashlib.sha256(token.encode()).hexdigest()[:16]
+            self.reply(200, {
+                "sub": subject,
+                "email": f"{subject}@stub.local",
+                "email_verified": True,
+                "name": f"stub_{subject[:8]}",
+                "expires_in": expires_in,
+            })
+
+        def reply(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubUserInfoHandler
+
+
+class Command(BaseCommand):
+    help = ("Serve a local OAuth userinfo stub for the 'stub' social provider "
+            "(export SOCIAL_STUB_URL=http://127.0.0.1:<port>/userinfo). With --check, "
+            "run the provider verification path against it and exit.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=float, default=50, help="simulated provider latency")
+        parser.add_argument("--expires-in", type=int, default=3600)
+        parser.add_argument("--check", action="store_true")
+        parser.add_argument("--tokens", type=int, default=200, help="distinct tokens used by --check")
+
+    def handle(self, *args, **opts):
+        server = ThreadingHTTPServer(("127.0.0.1", opts["port"]),
+                                     make_handler(opts["latency_ms"] / 1000, opts["expires_in"]))
+        url = f"http://127.0.0.1:{server.server_port}/userinfo"
+        if not opts["check"]:
+            self.stdout.write(f"Stub userinfo endpoint on {url}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            return
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            self.run_check(identity.OAuthProvider("stub", url), opts["tokens"])
+        finally:
+            server.shutdown()
+
+    def run_check(self, provider, n):
+        identity._providers["stub"] = provider
+        try:
+            identity.verify("stub", "invalid-token")
+        except identity.IdentityError:
+            pass
+        else:
+            raise CommandError("invalid token was accepted")
+
+        token = f"check-{time.time()}"
+        start = time.perf_counter()
+        first = identity.verify("stub", token)
+        miss = time.perf_counter() - start
+        start = time.perf_counter()
+        second = identity.verify("stub", token)
+        hit = time.perf_counter() - start
+        if first.email != second.email:
+            raise CommandError("cached identity differs from the verified one")
+        self.stdout.write(f"sync verify: miss {miss * 1000:.1f}ms, cached {hit * 1000:.2f}ms")
+
+        async def verify_many():
+            tokens = [f"load-{time.time()}-{i}" for i in range(n)]
+            start = time.perf_counter()
+            await asyncio.gather(*(identity.averify("stub", t) for t in tokens))
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            await asyncio.gather(*(identity.averify("stub", t) for t in tokens))
+            return cold, time.perf_counter() - start
+
+        cold, warm = asyncio.run(verify_many())
+        self.stdout.write(f"async verify x{n}: cold {n / cold:.0f}/s (pooled, "
+                          f"{identity.SOCIAL_HTTP_MAX_CONNECTIONS} connections), cached {n / warm:.0f}/s")
@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ("Local replication harness for the sqlite profile: copies the default database "
+            "file onto every replica file with the online backup API.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0,
+                            help="keep syncing every N seconds (0 = sync once and exit)")
+
+    def handle(self, *args, **opts):
+        default = settings.DATABASES["default"]
+        if default["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("sync_replicas only supports the sqlite profile")
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas:
+            raise CommandError("No replicas configured, set DB_REPLICAS=path1.sqlite3,path2.sqlite3")
+
+        while True:
+            start = time.perf_counter()
+            for alias in replicas:
+                self.sync(default["NAME"], settings.DATABASES[alias]["NAME"])
+            self.stdout.write(f"Synced {len(replicas)} replica(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+            if not opts["interval"]:
+                break
+            time.sleep(opts["interval"])
+
+    def sync(self, source_path, target_path):
+        source = sqlite3.connect(str(source_path))
+        target = sqlite3.connect(str(target_path))
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
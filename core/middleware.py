@@ -1,9 +1,22 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
 from urllib.parse import parse_qs
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from channels.db import database_sync_to_async
 from rest_framework_simplejwt.tokens import AccessToken
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
 
 User = get_user_model()
+profile_logger = logging.getLogger("ai_net.profiling")
 
 class JWTAuthMiddleware:
     def __init__(self, inner):
@@ -39,3 +52,166 @@ class JWTAuthMiddlewareInstance:
             return User.objects.get(id=user_id)
         except User.DoesNotExist:
             return None
+
+
+# -------------------------------------------------------------------------
+# HTTP request profiling
+# -------------------------------------------------------------------------
+class QueryRecorder:
+    """
+    connection.execute_wrapper hook collecting per-query SQL and duration.
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, (time.perf_counter() - start) * 1000))
+
+    @property
+    def total_ms(self):
+        return sum(ms for _, ms in self.queries)
+
+
+# [elapsed ms, nesting depth] of the request being profiled, None otherwise
+_serialization = ContextVar("profiling_serialization", default=None)
+_serializer_data = BaseSerializer.data
+
+
+def _timed_serializer_data(self):
+    """
+    BaseSerializer.data with the outermost call of each serializer tree timed.
+    Services build .data before the view returns, so this is not part of render.
+    """
+    timing = _serialization.get()
+    if timing is None:
+        return _serializer_data.fget(self)
+    timing[1] += 1
+    start = time.perf_counter()
+    try:
+        return _serializer_data.fget(self)
+    finally:
+        timing[1] -= 1
+        if not timing[1]:
+            timing[0] += (time.perf_counter() - start) * 1000
+
+
+def install_serializer_timing():
+    BaseSerializer.data = property(_timed_serializer_data)
+
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in (settings.PROFILING_ENABLED) timing of API requests: wall time, DB
+    query count/time, serializer .data time, response render time and size,
+    reported in a Server-Timing header. Slow requests and query-count outliers are logged
+    with their SQL. Sending "X-Profile: <PROFILING_TOKEN>" runs the request
+    under cProfile and writes the stats to PROFILING_DIR.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.enabled = getattr(settings, "PROFILING_ENABLED", False)
+        self.paths = tuple(getattr(settings, "PROFILING_PATHS", ("/",)))
+        self.slow_ms = getattr(settings, "PROFILING_SLOW_MS", 500)
+        self.max_queries = getattr(settings, "PROFILING_MAX_QUERIES", 30)
+        self.token = getattr(settings, "PROFILING_TOKEN", "")
+        self.profile_dir = getattr(settings, "PROFILING_DIR", None)
+        if self.enabled:
+            install_serializer_timing()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled or not request.path.startswith(self.paths):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._profiling_render = [0.0]
+        serialization = [0.0, 0]
+        profiler = cProfile.Profile() if self.token and request.headers.get("X-Profile") == self.token else None
+
+        start = time.perf_counter()
+        token = _serialization.set(serialization)
+        with ExitStack() as stack:
+            stack.callback(_serialization.reset, token)
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            if profiler:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler:
+                    profiler.disable()
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        render_ms = request._profiling_render[0]
+        serialize_ms = serialization[0]
+        size = len(response.content) if not response.streaming else -1
+        response["Server-Timing"] = (
+            f'app;dur={wall_ms:.1f}, db;dur={recorder.total_ms:.1f};desc="{len(recorder.queries)} queries", '
+            f"serialize;dur={serialize_ms:.1f}, render;dur={render_ms:.1f}"
+        )
+        profile_logger.info(
+            "%s %s %s wall=%.1fms db=%.1fms queries=%d serialize=%.1fms render=%.1fms bytes=%d",
+            request.method, request.path, response.status_code,
+            wall_ms, recorder.total_ms, len(recorder.queries), serialize_ms, render_ms, size,
+        )
+        if wall_ms > self.slow_ms or len(recorder.queries) > self.max_queries:
+            slowest = sorted(recorder.queries, key=lambda q: q[1], reverse=True)[:20]
+            profile_logger.warning(
+                "Slow request %s %s: wall=%.1fms queries=%d\n%s",
+                request.method, request.get_full_path(), wall_ms, len(recorder.queries),
+                "\n".join(f"  {ms:8.2f}ms  {sql[:500]}" for sql, ms in slowest),
+            )
+        if profiler:
+            self.dump_profile(request, profiler)
+        return response
+
+    async def __acall__(self, request):
+        """
+        Under ASGI only wall and serializer time are reported: queries of async
+        views run on executor threads whose connections are not wrapped here.
+        """
+        if not self.enabled or not request.path.startswith(self.paths):
+            return await self.get_response(request)
+        serialization = [0.0, 0]
+        token = _serialization.set(serialization)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _serialization.reset(token)
+        wall_ms = (time.perf_counter() - start) * 1000
+        response["Server-Timing"] = f"app;dur={wall_ms:.1f}, serialize;dur={serialization[0]:.1f}"
+        profile_logger.info("%s %s %s wall=%.1fms serialize=%.1fms",
+                            request.method, request.path, response.status_code, wall_ms, serialization[0])
+        if wall_ms > self.slow_ms:
+            profile_logger.warning("Slow request %s %s: wall=%.1fms", request.method, request.get_full_path(), wall_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Responses are rendered after the view returns, time it separately
+        if hasattr(request, "_profiling_render"):
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda r: request._profiling_render.__setitem__(0, (time.perf_counter() - started) * 1000)
+            )
+        return response
+
+    def dump_profile(self, request, profiler):
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats("cumulative").print_stats(30)
+        profile_logger.warning("Profile for %s %s\n%s", request.method, request.path, stats_text.getvalue())
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = f"{int(time.time() * 1000)}_{request.method}_{request.path.strip('/').replace('/', '_') or 'root'}.prof"
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
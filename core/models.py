@@ -1,4 +1,6 @@
+from datetime import timedelta
 from django.db import models
+from django.utils import timezone
 from django.core.validators import RegexValidator, EmailValidator
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -38,12 +40,23 @@ class Agent(models.Model):
     name = models.CharField(max_length=100)
     field = models.CharField(max_length=50, choices=AgentField.choices)
     sub_field = models.CharField(max_length=50)
-    agent_style = models.CharField(max_length=20, choices=AgentStyle.choices, default=AgentStyle.ENTHUSIAST)
+    agent_style = models.CharField(max_length=20, choices=AgentStyle.choices, default=AgentStyle.GENERALIST)
     description = models.TextField(blank=True)
     avatar_url = models.URLField(blank=True)
     avatar_image = models.ImageField(upload_to="avatars/", blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    user = models.ForeignKey(User, on_delete="cascade", null= True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null= True)
+
+    # Posting cadence, see core.planner. Empty values fall back to the style defaults.
+    posting_interval_minutes = models.PositiveIntegerField(null=True, blank=True)
+    daily_post_quota = models.PositiveSmallIntegerField(null=True, blank=True)
+    next_post_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_post_at']),
+            models.Index(fields=['field', 'sub_field']),
+        ]
 
     def __str__(self):
         return self.name
@@ -86,10 +99,32 @@ class Post(models.Model):
     sub_field = models.CharField(blank=False, max_length=50)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['agent', 'created_at']),
+        ]
+
     def __str__(self):
         return self.title
 
 
+class PostScore(models.Model):
+    """
+    Precomputed trending score, written in batches by core.trending.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name="trending")
+    field = models.CharField(max_length=50, choices=Post.PostCategory.choices)
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-post']),
+            models.Index(fields=['field', '-score', '-post']),
+        ]
+
+
 class PostImage(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="post_images/")
@@ -111,6 +146,10 @@ class Story(models.Model):
         TEXT = "TXT", "text"
         QUOTE = "QOT", "quote"
 
+    owner_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
+    owner_object_id = models.PositiveIntegerField()
+    owner = GenericForeignKey('owner_content_type', 'owner_object_id')
+
     content = models.TextField(blank=False)
     type = models.CharField(
         max_length=3,
@@ -118,6 +157,18 @@ class Story(models.Model):
         default=StoryType.TEXT,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner_content_type', 'owner_object_id', 'created_at']),
+            models.Index(fields=['expires_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.expires_at is None:
+            self.expires_at = timezone.now() + timedelta(hours=getattr(settings, "STORY_TTL_HOURS", 24))
+        super().save(*args, **kwargs)
 
 
 class Follow(models.Model):
@@ -134,6 +185,10 @@ class Follow(models.Model):
                 name='unique_follow_per_target'
             )
         ]
+        indexes = [
+            models.Index(fields=['target_content_type', 'target_object_id', 'follow_date']),
+            models.Index(fields=['follower', 'follow_date']),
+        ]
 
     def __str__(self):
         return f"{self.follower} → {self.target_content_type.model}:{self.target_object_id}"
@@ -173,6 +228,23 @@ class ChatMessage(models.Model):
             raise ValidationError('image_base64 is required for IMG64 messages')
 
 
+class ConversationSummary(models.Model):
+    """
+    Rolling summary of a user <-> agent chat, covering every message up to
+    `summarized_up_to`. Maintained incrementally by core.context.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="conversation_summaries")
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name="conversation_summaries")
+    summary = models.TextField(blank=True)
+    summarized_up_to = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'agent'], name='unique_summary_per_conversation')
+        ]
+
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     sender_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='+')
@@ -183,12 +255,81 @@ class Comment(models.Model):
     receiver_object_id = models.PositiveIntegerField()
     receiver = GenericForeignKey('receiver_content_type', 'receiver_object_id')
 
+    # Threads are one level deep: replies point at a top-level comment
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name="replies")
+    reply_count = models.PositiveIntegerField(default=0)
+
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ("post", "sender_content_type", "sender_object_id", "receiver_content_type", "receiver_object_id")
         indexes = [
             models.Index(fields=['created_at']),
-            models.Index(fields=['post']),
+            models.Index(fields=['post', 'parent', 'created_at', 'id']),
+            models.Index(fields=['parent', 'created_at', 'id']),
         ]
+
+
+class AgentReplyTask(models.Model):
+    """
+    Queue entry for a comment addressed to an agent, drained by core.replies.
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        PROCESSING = "PROCESSING", "Processing"
+        DONE = "DONE", "Done"
+        EXPIRED = "EXPIRED", "Expired"
+
+    comment = models.OneToOneField(Comment, on_delete=models.CASCADE, related_name="agent_reply_task")
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name="reply_tasks")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    # throttled tasks are not claimed again before this time
+    not_before = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['claimed_by']),
+        ]
+
+
+class GenerationCall(models.Model):
+    """
+    One LLM or image generation call, recorded by core.telemetry.
+    """
+    class Kind(models.TextChoices):
+        TEXT = "TEXT", "Text"
+        IMAGE = "IMAGE", "Image"
+
+    operation = models.CharField(max_length=50)
+    kind = models.CharField(max_length=5, choices=Kind.choices, default=Kind.TEXT)
+    model_name = models.CharField(max_length=100)
+    started_at = models.DateTimeField()
+    latency_ms = models.PositiveIntegerField()
+    input_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    retries = models.PositiveSmallIntegerField(default=0)
+    images = models.PositiveSmallIntegerField(default=0)
+    success = models.BooleanField(default=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['started_at']),
+            models.Index(fields=['operation', 'started_at']),
+            models.Index(fields=['model_name', 'started_at']),
+        ]
+
+
+class RevokedToken(models.Model):
+    """
+    A revoked refresh token, checked by core.revocation. Issued tokens are
+    not recorded, so signing in writes nothing.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,93 @@
+# core/planner.py
+
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Agent, Post
+
+
+# -------------------------------------------------------------------------
+# Agent posting planner
+# -------------------------------------------------------------------------
+# Every agent carries its own next_post_at. A planner pass reads only the
+# due agents through the next_post_at index, pushes their next slot forward
+# (interval +/- jitter) and hands them to core.cron for generation. Agents
+# that used up their daily quota are moved to the next day. Slots are moved
+# with a conditional UPDATE, so overlapping planner runs (cron starts each job
+# in its own process) split the due agents instead of posting twice.
+
+# agent_style -> (interval in minutes, posts per day)
+STYLE_CADENCE = getattr(settings, "AGENT_STYLE_CADENCE", {
+    Agent.AgentStyle.INFLUENCER: (4 * 60, 6),
+    Agent.AgentStyle.JOURNALIST: (6 * 60, 4),
+    Agent.AgentStyle.GENERALIST: (8 * 60, 3),
+    Agent.AgentStyle.PROFESSIONAL: (12 * 60, 2),
+})
+DEFAULT_CADENCE = (8 * 60, 3)
+CADENCE_JITTER = 0.2
+SCHEDULE_CHUNK = 1000
+
+
+def cadence(agent):
+    interval, quota = STYLE_CADENCE.get(agent.agent_style, DEFAULT_CADENCE)
+    return agent.posting_interval_minutes or interval, agent.daily_post_quota or quota
+
+
+def _jittered(now, minutes):
+    return now + timedelta(minutes=float(minutes) * np.random.uniform(1 - CADENCE_JITTER, 1 + CADENCE_JITTER))
+
+
+def schedule_unscheduled(now=None):
+    """
+    Give new agents a first slot spread over their interval, so thousands of
+    agents created at once do not all come due together.
+    """
+    now = now or timezone.now()
+    scheduled = 0
+    while True:
+        agents = list(Agent.objects.filter(next_post_at__isnull=True)
+                      .only("id", "agent_style", "posting_interval_minutes", "daily_post_quota")[:SCHEDULE_CHUNK])
+        if not agents:
+            return scheduled
+        for agent in agents:
+            interval, _ = cadence(agent)
+            agent.next_post_at = now + timedelta(minutes=float(np.random.uniform(0, interval)))
+        Agent.objects.bulk_update(agents, ["next_post_at"])
+        scheduled += len(agents)
+
+
+def claim_due_agents(now=None, limit=50):
+    """
+    Return up to `limit` agents that should post now, and move every due
+    agent looked at to its next slot. An agent is only returned by the run
+    whose UPDATE still saw the slot it read.
+    """
+    now = now or timezone.now()
+    due = list(Agent.objects.filter(next_post_at__lte=now).order_by("next_post_at")[:limit])
+    if not due:
+        return []
+
+    day_start = timezone.make_aware(datetime.combine(timezone.localdate(now), time.min))
+    posted_today = dict(Post.objects.filter(agent__in=due, created_at__gte=day_start)
+                        .values("agent_id").annotate(n=Count("id")).values_list("agent_id", "n"))
+
+    ready = []
+    with transaction.atomic():
+        for agent in due:
+            interval, quota = cadence(agent)
+            over_quota = posted_today.get(agent.id, 0) >= quota
+            if over_quota:
+                next_post_at = _jittered(day_start + timedelta(days=1), interval * CADENCE_JITTER)
+            else:
+                next_post_at = _jittered(now, interval)
+            claimed = Agent.objects.filter(id=agent.id, next_post_at=agent.next_post_at) \
+                                   .update(next_post_at=next_post_at)
+            if claimed and not over_quota:
+                agent.next_post_at = next_post_at
+                ready.append(agent)
+    return ready
@@ -0,0 +1,60 @@
+# core/polymorphic.py
+
+from asgiref.sync import sync_to_async
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_migrate
+
+
+# -------------------------------------------------------------------------
+# Polymorphic target registry
+# -------------------------------------------------------------------------
+# Public type name -> (app_label, model). Extend with register_target().
+POLYMORPHIC_TARGETS = {
+    'user': ('accounts', 'user'),
+    'agent': ('core', 'agent'),
+}
+
+_content_types = {}
+
+
+def register_target(type_name: str, app_label: str, model: str):
+    POLYMORPHIC_TARGETS[type_name.lower()] = (app_label, model.lower())
+    _content_types.pop(type_name.lower(), None)
+
+
+def get_content_type(type_name: str) -> ContentType:
+    """
+    Resolve a public type name ('user', 'agent', ...) to its ContentType.
+    Resolved once per process; raises KeyError for unknown names.
+    """
+    type_name = type_name.lower()
+    ct = _content_types.get(type_name)
+    if ct is None:
+        app_label, model = POLYMORPHIC_TARGETS[type_name]
+        ct = ContentType.objects.get_by_natural_key(app_label, model)
+        _content_types[type_name] = ct
+    return ct
+
+
+async def aget_content_type(type_name: str) -> ContentType:
+    ct = _content_types.get(type_name.lower())
+    return ct if ct is not None else await sync_to_async(get_content_type)(type_name)
+
+
+def get_type_name(obj) -> str:
+    """
+    Reverse lookup: model instance or class -> public type name.
+    """
+    key = (obj._meta.app_label, obj._meta.model_name)
+    for type_name, target in POLYMORPHIC_TARGETS.items():
+        if target == key:
+            return type_name
+    return obj._meta.model_name
+
+
+def clear_cache(**kwargs):
+    _content_types.clear()
+
+
+# ContentType ids may change when the test runner flushes/migrates the DB
+post_migrate.connect(clear_cache, dispatch_uid="core_polymorphic_clear_cache")
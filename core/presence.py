@@ -0,0 +1,81 @@
+# core/presence.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# -------------------------------------------------------------------------
+# Presence
+# -------------------------------------------------------------------------
+# A user is online while a socket keeps refreshing its presence key with
+# heartbeats. Nothing touches the database: the key lives in the cache (shared
+# across workers when CACHE_BACKEND is file/redis) and expires PRESENCE_TTL
+# seconds after the last heartbeat, so crashed workers clean up by themselves.
+# A shared per-user socket count decides when the last socket is gone.
+
+PRESENCE_TTL = getattr(settings, "PRESENCE_TTL", 60)
+HEARTBEAT_INTERVAL = getattr(settings, "PRESENCE_HEARTBEAT_INTERVAL", 25)
+
+# user_id -> set of channel names connected to this process
+_local_connections = {}
+
+
+def _key(user_id):
+    return f"presence:{user_id}"
+
+
+def _count_key(user_id):
+    return f"presence:sockets:{user_id}"
+
+
+def connect(user_id, channel_name):
+    _local_connections.setdefault(user_id, set()).add(channel_name)
+    if not cache.add(_count_key(user_id), 1, PRESENCE_TTL):
+        try:
+            cache.incr(_count_key(user_id))
+        except ValueError:
+            # expired between add() and incr()
+            cache.set(_count_key(user_id), 1, PRESENCE_TTL)
+    heartbeat(user_id)
+
+
+def heartbeat(user_id):
+    cache.set(_key(user_id), time.time(), PRESENCE_TTL)
+    cache.touch(_count_key(user_id), PRESENCE_TTL)
+
+
+def disconnect(user_id, channel_name):
+    """
+    Returns True when the user has no socket left on any worker. Sockets of a
+    crashed worker are never counted down, the user then goes offline when the
+    presence key expires PRESENCE_TTL after the last heartbeat.
+    """
+    channels = _local_connections.get(user_id, set())
+    if channel_name not in channels:
+        return False
+    channels.discard(channel_name)
+    if not channels:
+        _local_connections.pop(user_id, None)
+    try:
+        remaining = cache.decr(_count_key(user_id))
+    except ValueError:
+        remaining = 0
+    if remaining > 0:
+        return False
+    cache.delete_many([_key(user_id), _count_key(user_id)])
+    return True
+
+
+def last_seen(user_id):
+    return cache.get(_key(user_id))
+
+
+def is_online(user_id):
+    return last_seen(user_id) is not None
+
+
+def get_presence(user_ids):
+    found = cache.get_many([_key(uid) for uid in user_ids])
+    return {uid: {"online": _key(uid) in found, "last_seen": found.get(_key(uid))} for uid in user_ids}
@@ -0,0 +1,308 @@
+# core/recommendations.py
+
+import os
+import threading
+from datetime import timedelta
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .data import agent_categories_with_subcategories
+from .models import Agent, Follow, Post
+from .polymorphic import get_content_type
+
+
+# -------------------------------------------------------------------------
+# Agent recommendations
+# -------------------------------------------------------------------------
+# Scores are a weighted sum of:
+#   co-follow   : agents followed by people who follow the same agents as the user
+#   taxonomy    : field / sub_field overlap with the agents the user follows
+#   activity    : recent post volume of the agent
+# Matrices are built by a background job and persisted to an .npz file, web
+# processes load it lazily and reload when the file changes.
+
+WEIGHTS = getattr(settings, "RECOMMENDER_WEIGHTS", {
+    "co_follow": 0.5,
+    "field": 0.2,
+    "sub_field": 0.15,
+    "activity": 0.15,
+})
+ACTIVITY_WINDOW = timedelta(days=getattr(settings, "RECOMMENDER_ACTIVITY_DAYS", 7))
+MATRIX_PATH = getattr(settings, "RECOMMENDER_MATRIX_PATH", os.path.join(settings.BASE_DIR, "var", "recommender.npz"))
+
+FIELDS = list(agent_categories_with_subcategories.keys())
+FIELD_INDEX = {f: i for i, f in enumerate(FIELDS)}
+SUB_FIELDS = [sf for f in FIELDS for sf in agent_categories_with_subcategories[f]]
+SUB_FIELD_INDEX = {sf: i for i, sf in enumerate(SUB_FIELDS)}
+
+
+def _normalize(v):
+    peak = v.max() if v.size else 0
+    return v / peak if peak > 0 else v
+
+
+class AgentRecommender:
+    def __init__(self, agent_ids, user_ids, follows, agent_fields, agent_sub_fields, activity, watermark,
+                 co_follow=None):
+        self.agent_ids = agent_ids              # (n_agents,) int64
+        self.user_ids = user_ids                # (n_users,) int64
+        self.follows = follows                  # (n_users, n_agents) csr, 1 = follows
+        self.agent_fields = agent_fields        # (n_agents, n_fields) csr one-hot
+        self.agent_sub_fields = agent_sub_fields  # (n_agents, n_sub_fields) csr one-hot
+        self.activity = activity                # (n_agents,) float32, normalized
+        self.watermark = watermark              # last Follow id folded into `follows`
+        # The diagonal is left in place, followed agents are masked out when scoring
+        if co_follow is None:
+            co_follow = (self.follows.T @ self.follows).tocsr()
+        self.co_follow = co_follow              # (n_agents, n_agents) csr, A^T A
+
+    # ---------- build ----------
+    @classmethod
+    def build(cls):
+        agents = list(Agent.objects.order_by("id").values_list("id", "field", "sub_field"))
+        agent_ids = np.array([a[0] for a in agents], dtype=np.int64)
+        agent_fields = _one_hot([FIELD_INDEX.get(a[1]) for a in agents], len(FIELDS))
+        agent_sub_fields = _one_hot([SUB_FIELD_INDEX.get(a[2]) for a in agents], len(SUB_FIELDS))
+
+        agent_ct = get_content_type("agent")
+        rows = np.array(
+            list(Follow.objects.filter(target_content_type=agent_ct)
+                 .values_list("id", "follower_id", "target_object_id").iterator(chunk_size=10000)),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        user_ids = np.unique(rows[:, 1])
+        watermark = int(rows[:, 0].max()) if len(rows) else 0
+        follows = _follow_matrix(rows, user_ids, agent_ids)
+
+        return cls(agent_ids, user_ids, follows, agent_fields, agent_sub_fields,
+                   _activity_vector(agent_ids), watermark)
+
+    def refresh(self):
+        """
+        Fold in agents and follows created since the last build, recompute activity.
+        Unfollows are only picked up by a full build().
+        """
+        new_agents = list(Agent.objects.filter(id__gt=self.agent_ids.max() if len(self.agent_ids) else 0)
+                          .order_by("id").values_list("id", "field", "sub_field"))
+        if new_agents:
+            self.agent_ids = np.concatenate([self.agent_ids, np.array([a[0] for a in new_agents], dtype=np.int64)])
+            self.agent_fields = sparse.vstack([
+                self.agent_fields, _one_hot([FIELD_INDEX.get(a[1]) for a in new_agents], len(FIELDS))]).tocsr()
+            self.agent_sub_fields = sparse.vstack([
+                self.agent_sub_fields, _one_hot([SUB_FIELD_INDEX.get(a[2]) for a in new_agents], len(SUB_FIELDS))]).tocsr()
+
+        agent_ct = get_content_type("agent")
+        rows = np.array(
+            list(Follow.objects.filter(target_content_type=agent_ct, id__gt=self.watermark)
+                 .values_list("id", "follower_id", "target_object_id")),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        new_users = np.setdiff1d(np.unique(rows[:, 1]), self.user_ids)
+        self.user_ids = np.concatenate([self.user_ids, new_users])
+
+        shape = (len(self.user_ids), len(self.agent_ids))
+        old = self.follows
+        old.resize(shape)
+        if len(rows):
+            self.watermark = int(rows[:, 0].max())
+            delta = _follow_matrix(rows, self.user_ids, self.agent_ids)
+            self.follows = _binary(old + delta)
+            # Only the genuinely new edges D: C' = (A + D)^T (A + D) = C + A^T D + D^T A + D^T D
+            delta = (self.follows - old).tocsr()
+            delta.eliminate_zeros()
+            increment = old.T @ delta
+            increment = increment + increment.T + delta.T @ delta
+            co_follow = self.co_follow
+            co_follow.resize((shape[1], shape[1]))
+            self.co_follow = (co_follow + increment).tocsr()
+        else:
+            self.follows = old.tocsr()
+            self.co_follow.resize((shape[1], shape[1]))
+
+        self.activity = _activity_vector(self.agent_ids)
+        return self
+
+    # ---------- persistence ----------
+    def save(self, path=MATRIX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp,
+            agent_ids=self.agent_ids, user_ids=self.user_ids, activity=self.activity,
+            watermark=np.array([self.watermark]),
+            **_dump_csr("follows", self.follows),
+            **_dump_csr("co_follow", self.co_follow),
+            **_dump_csr("agent_fields", self.agent_fields),
+            **_dump_csr("agent_sub_fields", self.agent_sub_fields),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=MATRIX_PATH):
+        with np.load(path) as f:
+            # files written before co_follow was persisted fall back to recomputing it
+            co_follow = _load_csr("co_follow", f) if "co_follow_data" in f.files else None
+            return cls(
+                f["agent_ids"], f["user_ids"],
+                _load_csr("follows", f), _load_csr("agent_fields", f), _load_csr("agent_sub_fields", f),
+                f["activity"], int(f["watermark"][0]), co_follow,
+            )
+
+    # ---------- scoring ----------
+    def followed_vector(self, user_id):
+        """
+        The user's current agent follows, read live so the result reflects
+        follows made after the last rebuild.
+        """
+        agent_ct = get_content_type("agent")
+        ids = np.fromiter(
+            Follow.objects.filter(follower_id=user_id, target_content_type=agent_ct)
+                          .values_list("target_object_id", flat=True),
+            dtype=np.int64,
+        )
+        v = np.zeros(len(self.agent_ids), dtype=np.float32)
+        pos, found = _lookup(self.agent_ids, ids)
+        v[pos[found]] = 1
+        return v
+
+    def scores(self, followed):
+        scores = WEIGHTS["activity"] * self.activity.astype(np.float32)
+        if followed.any():
+            scores += WEIGHTS["co_follow"] * _normalize(np.asarray(self.co_follow @ followed, dtype=np.float32))
+            field_profile = self.agent_fields.T @ followed
+            scores += WEIGHTS["field"] * _normalize(np.asarray(self.agent_fields @ field_profile, dtype=np.float32))
+            sub_field_profile = self.agent_sub_fields.T @ followed
+            scores += WEIGHTS["sub_field"] * _normalize(
+                np.asarray(self.agent_sub_fields @ sub_field_profile, dtype=np.float32))
+        scores[followed > 0] = -np.inf
+        return scores
+
+    def top_k(self, user_id, k=10):
+        if not len(self.agent_ids):
+            return []
+        scores = self.scores(self.followed_vector(user_id))
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.agent_ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+def _one_hot(indices, width):
+    rows = [r for r, c in enumerate(indices) if c is not None]
+    cols = [c for c in indices if c is not None]
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(indices), width))
+
+
+def _lookup(keys, values):
+    """
+    Vectorized positions of `values` in the (not necessarily sorted) `keys` array.
+    Returns (positions, found_mask).
+    """
+    if not len(keys):
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    pos = np.searchsorted(sorted_keys, values).clip(max=len(keys) - 1)
+    found = sorted_keys[pos] == values
+    return order[pos], found
+
+
+def _binary(m):
+    m = m.tocsr()
+    m.sum_duplicates()
+    m.data[:] = 1
+    return m
+
+
+def _follow_matrix(rows, user_ids, agent_ids):
+    u, u_found = _lookup(user_ids, rows[:, 1])
+    a, a_found = _lookup(agent_ids, rows[:, 2])
+    keep = u_found & a_found
+    m = sparse.csr_matrix(
+        (np.ones(int(keep.sum()), dtype=np.float32), (u[keep], a[keep])),
+        shape=(len(user_ids), len(agent_ids)),
+    )
+    return _binary(m)
+
+
+def _activity_vector(agent_ids):
+    since = timezone.now() - ACTIVITY_WINDOW
+    counts = np.array(
+        list(Post.objects.filter(created_at__gte=since, agent__isnull=False)
+             .values("agent_id").annotate(n=Count("id")).values_list("agent_id", "n")),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    v = np.zeros(len(agent_ids), dtype=np.float32)
+    pos, found = _lookup(agent_ids, counts[:, 0])
+    v[pos[found]] = counts[found, 1]
+    return _normalize(np.log1p(v))
+
+
+def _dump_csr(name, m):
+    m = m.tocsr()
+    return {f"{name}_data": m.data, f"{name}_indices": m.indices,
+            f"{name}_indptr": m.indptr, f"{name}_shape": np.array(m.shape)}
+
+
+def _load_csr(name, f):
+    return sparse.csr_matrix(
+        (f[f"{name}_data"], f[f"{name}_indices"], f[f"{name}_indptr"]), shape=tuple(f[f"{name}_shape"]))
+
+
+# -------------------------------------------------------------------------
+# Process-wide instance
+# -------------------------------------------------------------------------
+_lock = threading.Lock()
+_recommender = None
+_loaded_mtime = None
+
+
+def get_recommender():
+    """
+    The persisted recommender, reloaded when the file changes. None until the
+    cron job has built it, requests never build the matrices themselves.
+    """
+    global _recommender, _loaded_mtime
+    try:
+        mtime = os.path.getmtime(MATRIX_PATH)
+    except OSError:
+        return None
+    with _lock:
+        if _recommender is None or mtime != _loaded_mtime:
+            _recommender = AgentRecommender.load()
+            _loaded_mtime = mtime
+        return _recommender
+
+
+def popular_agents(user_id, k=10):
+    """
+    Fallback ranking while no matrix exists: most followed agents the user
+    does not follow yet, scored by follower count relative to the top one.
+    """
+    agent_ct = get_content_type("agent")
+    follows = Follow.objects.filter(target_content_type=agent_ct)
+    followed = follows.filter(follower_id=user_id).values("target_object_id")
+    counts = list(follows.exclude(target_object_id__in=followed)
+                  .values("target_object_id").annotate(n=Count("id"))
+                  .order_by("-n", "target_object_id").values_list("target_object_id", "n")[:k])
+    peak = counts[0][1] if counts else 0
+    return [(agent_id, n / peak) for agent_id, n in counts]
+
+
+def refresh_recommendations_job(full=False):
+    """
+    Cron entry point: incremental refresh of the persisted matrices, or a full
+    rebuild (also drops unfollows) when `full` is set or nothing exists yet.
+    """
+    if full or not os.path.exists(MATRIX_PATH):
+        recommender = AgentRecommender.build()
+    else:
+        recommender = AgentRecommender.load().refresh()
+    recommender.save()
+    print(f"Recommender refreshed: {len(recommender.agent_ids)} agents, "
+          f"{len(recommender.user_ids)} users, watermark {recommender.watermark}")
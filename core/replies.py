@@ -0,0 +1,234 @@
+# core/replies.py
+
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from .models import AgentReplyTask, Comment
+from .polymorphic import get_content_type
+from .caching import bump_model_version
+from . import llm
+from .telemetry import flush as flush_telemetry
+
+
+# -------------------------------------------------------------------------
+# Agent comment replies
+# -------------------------------------------------------------------------
+# Comments addressed to an agent are queued as AgentReplyTask rows. Each run
+# claims the oldest pending tasks, groups them per agent so one model call
+# answers up to AGENT_REPLY_BATCH comments, and writes all replies with a
+# single bulk_create. Agents are throttled per hour overall and per post;
+# throttled tasks are not claimed again until their budget frees up, and
+# expire after AGENT_REPLY_MAX_AGE.
+
+AGENT_REPLY_BATCH = getattr(settings, "AGENT_REPLY_BATCH", 8)
+AGENT_REPLY_MAX_CLAIM = getattr(settings, "AGENT_REPLY_MAX_CLAIM", 200)
+AGENT_REPLY_PARALLELISM = getattr(settings, "AGENT_REPLY_PARALLELISM", 4)
+AGENT_REPLY_PER_HOUR = getattr(settings, "AGENT_REPLY_PER_HOUR", 60)
+AGENT_REPLY_PER_POST_PER_HOUR = getattr(settings, "AGENT_REPLY_PER_POST_PER_HOUR", 10)
+AGENT_REPLY_MAX_AGE = timedelta(seconds=getattr(settings, "AGENT_REPLY_MAX_AGE", 6 * 3600))
+AGENT_REPLY_MAX_ATTEMPTS = getattr(settings, "AGENT_REPLY_MAX_ATTEMPTS", 3)
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue(comment):
+    if comment.receiver_content_type_id != get_content_type("agent").id:
+        return None
+    if comment.sender_content_type_id == comment.receiver_content_type_id:
+        # never let agents reply to agents
+        return None
+    return AgentReplyTask.objects.create(comment=comment, agent_id=comment.receiver_object_id)
+
+
+# ---------- queue bookkeeping ----------
+def _release_stale_claims(now):
+    AgentReplyTask.objects.filter(
+        status=AgentReplyTask.Status.PROCESSING, claimed_at__lt=now - CLAIM_TIMEOUT,
+    ).update(status=AgentReplyTask.Status.PENDING, claimed_by="")
+
+
+def _expire_old(now):
+    AgentReplyTask.objects.filter(
+        status=AgentReplyTask.Status.PENDING, created_at__lt=now - AGENT_REPLY_MAX_AGE,
+    ).update(status=AgentReplyTask.Status.EXPIRED)
+
+
+def _claim(now):
+    token = uuid.uuid4().hex
+    ready = Q(not_before__isnull=True) | Q(not_before__lte=now)
+    ids = list(AgentReplyTask.objects.filter(ready, status=AgentReplyTask.Status.PENDING)
+               .order_by("created_at").values_list("id", flat=True)[:AGENT_REPLY_MAX_CLAIM])
+    # Only rows still pending are taken, so concurrent workers never share a task
+    AgentReplyTask.objects.filter(id__in=ids, status=AgentReplyTask.Status.PENDING) \
+                          .update(status=AgentReplyTask.Status.PROCESSING, claimed_by=token,
+                                  claimed_at=now, attempts=F("attempts") + 1)
+    return list(AgentReplyTask.objects.filter(claimed_by=token)
+                .select_related("comment", "agent").order_by("created_at"))
+
+
+def _release(tasks):
+    """
+    Put tasks back in the queue, or expire them after too many attempts.
+    """
+    retry = [t.id for t in tasks if t.attempts < AGENT_REPLY_MAX_ATTEMPTS]
+    AgentReplyTask.objects.filter(id__in=retry).update(status=AgentReplyTask.Status.PENDING, claimed_by="")
+    AgentReplyTask.objects.filter(id__in=[t.id for t in tasks if t.id not in retry]) \
+                          .update(status=AgentReplyTask.Status.EXPIRED)
+
+
+# ---------- throttling ----------
+def _throttle(tasks, now):
+    """
+    Split claimed tasks into (allowed, deferred) honoring the hourly budgets.
+    deferred maps the earliest time a budget can free up to the task ids.
+    """
+    agent_ct = get_content_type("agent")
+    agent_ids = {t.agent_id for t in tasks}
+    window = timedelta(hours=1)
+    recent = Comment.objects.filter(
+        sender_content_type=agent_ct, sender_object_id__in=agent_ids, created_at__gte=now - window,
+    )
+    per_agent, agent_oldest = {}, {}
+    for a, n, oldest in (recent.values("sender_object_id").annotate(n=Count("id"), oldest=Min("created_at"))
+                         .values_list("sender_object_id", "n", "oldest")):
+        per_agent[a], agent_oldest[a] = n, oldest
+    per_post, post_oldest = {}, {}
+    for a, p, n, oldest in (recent.values("sender_object_id", "post_id")
+                            .annotate(n=Count("id"), oldest=Min("created_at"))
+                            .values_list("sender_object_id", "post_id", "n", "oldest")):
+        per_post[(a, p)], post_oldest[(a, p)] = n, oldest
+
+    allowed, deferred = [], {}
+    for task in tasks:
+        post_key = (task.agent_id, task.comment.post_id)
+        over_agent = per_agent.get(task.agent_id, 0) >= AGENT_REPLY_PER_HOUR
+        if over_agent or per_post.get(post_key, 0) >= AGENT_REPLY_PER_POST_PER_HOUR:
+            # a budget filled within this run has no reply older than now
+            if over_agent:
+                oldest = agent_oldest.get(task.agent_id, now)
+            else:
+                oldest = post_oldest.get(post_key, now)
+            deferred.setdefault(oldest + window, []).append(task.id)
+            continue
+        per_agent[task.agent_id] = per_agent.get(task.agent_id, 0) + 1
+        per_post[post_key] = per_post.get(post_key, 0) + 1
+        allowed.append(task)
+    return allowed, deferred
+
+
+# ---------- generation ----------
+def _batch_messages(agent, tasks):
+    numbered = "\n".join(f"[{t.comment_id}] {t.comment.text}" for t in tasks)
+    return [
+        SystemMessage(content=(
+            f"{llm.agent_system_prompt(agent)}\n"
+            "You are replying to comments left on your posts. Reply to each comment briefly. "
+            'Answer with a JSON object mapping each comment id to your reply, e.g. {"12": "Thanks!"}.'
+        )),
+        HumanMessage(content=numbered),
+    ]
+
+
+def _parse_replies(content, tasks):
+    text = content.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    try:
+        data = json.loads(text)
+        return {int(k): str(v) for k, v in data.items() if str(v).strip()}
+    except (ValueError, AttributeError):
+        # a plain-text answer is only usable when it can belong to a single comment
+        if len(tasks) == 1 and text:
+            return {tasks[0].comment_id: text}
+        return {}
+
+
+async def _generate(batches):
+    semaphore = asyncio.Semaphore(AGENT_REPLY_PARALLELISM)
+    model = llm.get_chat_model("comment_reply")
+
+    async def run(agent, tasks):
+        async with semaphore:
+            try:
+                result = await model.ainvoke(_batch_messages(agent, tasks))
+            except Exception as e:
+                print(f"Error generating replies for agent {agent.id}: {e}")
+                return tasks, {}
+            return tasks, _parse_replies(result.content, tasks)
+
+    return await asyncio.gather(*(run(agent, tasks) for agent, tasks in batches))
+
+
+def _batches(tasks):
+    by_agent = {}
+    for task in tasks:
+        by_agent.setdefault(task.agent_id, []).append(task)
+    for agent_tasks in by_agent.values():
+        for i in range(0, len(agent_tasks), AGENT_REPLY_BATCH):
+            chunk = agent_tasks[i:i + AGENT_REPLY_BATCH]
+            yield chunk[0].agent, chunk
+
+
+def _save(results):
+    agent_ct = get_content_type("agent")
+    replies, done, failed = [], [], []
+    for tasks, answers in results:
+        for task in tasks:
+            text = answers.get(task.comment_id)
+            if not text:
+                failed.append(task)
+                continue
+            comment = task.comment
+            replies.append(Comment(
+                post_id=comment.post_id,
+                parent_id=comment.parent_id or comment.id,
+                sender_content_type=agent_ct,
+                sender_object_id=task.agent_id,
+                receiver_content_type_id=comment.sender_content_type_id,
+                receiver_object_id=comment.sender_object_id,
+                text=text,
+            ))
+            done.append(task.id)
+
+    with transaction.atomic():
+        Comment.objects.bulk_create(replies, batch_size=500)
+        reply_counts = {}
+        for reply in replies:
+            reply_counts[reply.parent_id] = reply_counts.get(reply.parent_id, 0) + 1
+        for parent_id, n in reply_counts.items():
+            Comment.objects.filter(id=parent_id).update(reply_count=F("reply_count") + n)
+        AgentReplyTask.objects.filter(id__in=done).update(status=AgentReplyTask.Status.DONE)
+    if replies:
+        # bulk_create sends no post_save, invalidate cached comment pages by hand
+        bump_model_version(Comment)
+    _release(failed)
+    return len(replies)
+
+
+def process_agent_reply_queue():
+    """
+    Cron entry point: one pass over the queue.
+    """
+    now = timezone.now()
+    _release_stale_claims(now)
+    _expire_old(now)
+    tasks = _claim(now)
+    if not tasks:
+        return 0
+    allowed, deferred = _throttle(tasks, now)
+    # deferred tasks did not get a real attempt, and are skipped by _claim until not_before
+    for not_before, ids in deferred.items():
+        AgentReplyTask.objects.filter(id__in=ids).update(
+            status=AgentReplyTask.Status.PENDING, claimed_by="", not_before=not_before,
+            attempts=F("attempts") - 1,
+        )
+    created = _save(asyncio.run(_generate(list(_batches(allowed))))) if allowed else 0
+    flush_telemetry()
+    throttled = sum(len(ids) for ids in deferred.values())
+    print(f"Agent replies: {created} written, {throttled} throttled")
+    return created
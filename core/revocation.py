@@ -0,0 +1,155 @@
+# core/revocation.py
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import RevokedToken
+
+
+# -------------------------------------------------------------------------
+# Refresh token revocation
+# -------------------------------------------------------------------------
+# Revoked refresh tokens live in the RevokedToken table. simplejwt's
+# token_blacklist app is not installed: it records every issued token in
+# OutstandingToken, one write per sign-in, while only revoked jtis are ever
+# looked up. Each process keeps a Bloom filter of the revoked jtis so the
+# common case, a token that was never revoked, is answered without touching
+# the database; only filter hits (revoked tokens plus ~REVOCATION_BLOOM_ERROR_RATE false
+# positives) go to the indexed jti lookup.
+#
+# Revocations made in this process are added immediately. Those made by other
+# workers are pulled in by id watermark at most every REVOCATION_SYNC_SECONDS,
+# and the filter is rebuilt from unexpired rows every
+# REVOCATION_REBUILD_SECONDS so it never fills up with dead tokens. With
+# rotation on, a stale filter cannot let a revoked token through: rotating
+# revokes the presented token and fails if it was already revoked.
+
+REVOCATION_BLOOM_CAPACITY = getattr(settings, "REVOCATION_BLOOM_CAPACITY", 100_000)
+REVOCATION_BLOOM_ERROR_RATE = getattr(settings, "REVOCATION_BLOOM_ERROR_RATE", 0.001)
+REVOCATION_SYNC_SECONDS = getattr(settings, "REVOCATION_SYNC_SECONDS", 5)
+REVOCATION_REBUILD_SECONDS = getattr(settings, "REVOCATION_REBUILD_SECONDS", 3600)
+REVOCATION_PURGE_BATCH = 5000
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Kirsch-Mitzenmacher: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        a, b = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((a + i * b) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+_filter = None
+_last_id = 0
+_synced_at = 0.0
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+def rebuild():
+    global _filter, _last_id, _synced_at, _built_at
+    with _lock:
+        last_id = RevokedToken.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        live = RevokedToken.objects.filter(expires_at__gt=timezone.now(), id__lte=last_id)
+        bloom = BloomFilter(max(REVOCATION_BLOOM_CAPACITY, live.count() * 2), REVOCATION_BLOOM_ERROR_RATE)
+        for jti in live.values_list("jti", flat=True).iterator(chunk_size=5000):
+            bloom.add(jti)
+        _filter, _last_id = bloom, last_id
+        _synced_at = _built_at = time.monotonic()
+    return bloom.count
+
+
+def _sync():
+    global _last_id, _synced_at
+    with _lock:
+        rows = list(RevokedToken.objects.filter(id__gt=_last_id).order_by("id")
+                    .values_list("id", "jti"))
+        for row_id, jti in rows:
+            _filter.add(jti)
+            _last_id = row_id
+        _synced_at = time.monotonic()
+    return _filter.count > _filter.capacity
+
+
+def _current_filter():
+    now = time.monotonic()
+    if _filter is None or now - _built_at > REVOCATION_REBUILD_SECONDS:
+        rebuild()
+    elif now - _synced_at >= REVOCATION_SYNC_SECONDS and _sync():
+        # past capacity the false positive rate climbs, resize
+        rebuild()
+    return _filter
+
+
+def is_revoked(jti):
+    if jti not in _current_filter():
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def revoke(token):
+    """
+    Revoke a refresh token. Returns False when it was already revoked.
+    """
+    jti = token.payload[api_settings.JTI_CLAIM]
+    _, created = RevokedToken.objects.get_or_create(
+        jti=jti, defaults={"expires_at": datetime_from_epoch(token.payload["exp"])},
+    )
+    with _lock:
+        if _filter is not None:
+            _filter.add(jti)
+    return created
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    RefreshToken that is rejected once revoked, checked through the revocation filter.
+    """
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+
+def purge_expired():
+    """
+    Cron entry point: delete revocations of tokens that have expired anyway.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(RevokedToken.objects.filter(expires_at__lte=now).values_list("id", flat=True)
+                   [:REVOCATION_PURGE_BATCH])
+        if not ids:
+            return deleted
+        deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,152 @@
+# core/routers.py
+
+import functools
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+
+# -------------------------------------------------------------------------
+# Read replica routing
+# -------------------------------------------------------------------------
+# Reads only leave `default` inside a @read_replica service call, and only
+# when the current user has not written within REPLICA_STICKY_SECONDS
+# (read-your-writes).
+
+REPLICA_STICKY_SECONDS = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_primary_reads = ContextVar("primary_reads", default=False)
+_current_request = ContextVar("current_request", default=None)
+_current_user_id = ContextVar("current_user_id", default=None)
+
+
+def get_replicas():
+    return [alias for alias in getattr(settings, "DATABASE_REPLICAS", []) if alias in settings.DATABASES]
+
+
+def _pin_key(user_id):
+    return f"db:pin:{user_id}"
+
+
+def pin(user_id):
+    if user_id is not None:
+        cache.set(_pin_key(user_id), 1, REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+
+def current_user_id():
+    user_id = _current_user_id.get()
+    if user_id is not None:
+        return user_id
+    # DRF authenticates inside the view and assigns the user to the
+    # underlying HttpRequest, so resolve lazily
+    request = _current_request.get()
+    user = getattr(request, "user", None) if request is not None else None
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def read_replica(func):
+    """
+    Mark a read-only service function as safe to serve from a replica.
+    """
+    if iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def awrapper(*args, **kwargs):
+            token = _replica_reads.set(True)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+        return awrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    """
+    Keep reads on `default`, even inside @read_replica calls.
+    """
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and _replica_reads.get() and not _primary_reads.get() and not is_pinned(current_user_id()):
+            return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        pin(current_user_id())
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaPinningMiddleware:
+    """
+    Expose the current request to the router so writes pin the user to `default`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+
+@contextmanager
+def acting_user(user_id):
+    """
+    Attribute writes and reads to a user outside of HTTP requests
+    (websocket consumers, jobs).
+    """
+    token = _current_user_id.set(user_id)
+    try:
+        yield
+    finally:
+        _current_user_id.reset(token)
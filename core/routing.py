@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r"ws/chat/(?P<receiver_id>\d+)/$", consumers.ChatConsumer.as_asgi()),
+    re_path(r"ws/chat/agent/(?P<agent_id>\d+)/$", consumers.AgentChatConsumer.as_asgi()),
 ]
\ No newline at end of file
@@ -0,0 +1,278 @@
+# core/seeding.py
+
+import base64
+from datetime import timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .data import agent_categories_with_subcategories
+from .models import Agent, ChatMessage, Comment, Follow, Post, PostImage, PostLike
+from .polymorphic import get_content_type
+
+User = get_user_model()
+
+
+# -------------------------------------------------------------------------
+# Bulk dataset loaders
+# -------------------------------------------------------------------------
+# Used by the benchmark and data generation commands. Loaders sample whole
+# columns with NumPy and hand them to _insert, which either builds model
+# instances for bulk_create or, with raw=True, writes tuples straight through
+# cursor.executemany (SQLite only, skips model construction entirely).
+# New primary keys are read back with one range query instead of relying on
+# the backend to return them.
+
+SEED_PASSWORD = "benchpass"
+CHUNK_SIZE = 5000
+PLACEHOLDER_IMAGE = "post_images/synthetic.png"
+# 1x1 transparent PNG
+_PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+def _last_pk(model):
+    return model.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+
+def _timestamps(ages_seconds, now):
+    """
+    UTC timestamps `ages_seconds` before `now`, formatted the way the SQLite backend stores them.
+    """
+    now_us = np.datetime64(now.astimezone(dt_timezone.utc).replace(tzinfo=None), "us")
+    stamps = now_us - (np.asarray(ages_seconds) * 1e6).astype("timedelta64[us]")
+    return np.char.replace(np.datetime_as_string(stamps, unit="us"), "T", " ")
+
+
+def _column(values):
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+
+def _executemany(model, columns, now, chunk_size, ignore_conflicts=False):
+    """
+    INSERT the given columns, filling every other non-pk column with its
+    field default (or `now` for auto_now/auto_now_add fields).
+    """
+    opts = model._meta
+    constants = {}
+    for field in opts.concrete_fields:
+        if field.primary_key or field.attname in columns:
+            continue
+        auto = getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+        constants[field.column] = field.get_db_prep_save(now if auto else field.get_default(), connection)
+    names = [opts.get_field(name).column for name in columns] + list(constants)
+
+    quote = connection.ops.quote_name
+    sql = "INSERT {}INTO {} ({}) VALUES ({})".format(
+        "OR IGNORE " if ignore_conflicts else "",
+        quote(opts.db_table), ", ".join(quote(n) for n in names), ", ".join(["%s"] * len(names)),
+    )
+    values = [_column(v) for v in columns.values()]
+    tail = tuple(constants.values())
+    with connection.cursor() as cursor:
+        for i in range(0, len(values[0]), chunk_size):
+            rows = [row + tail for row in zip(*(v[i:i + chunk_size] for v in values))]
+            cursor.executemany(sql, rows)
+
+
+def _insert(model, columns, ages=None, date_field="created_at", now=None, raw=False, chunk_size=None,
+            ignore_conflicts=False):
+    """
+    Insert one row per position in the `columns` arrays ({attname: values})
+    and return the new primary keys. `ages` (seconds before now) spread the
+    rows' `date_field` over time. With `ignore_conflicts`, rows that collide
+    with a unique constraint (e.g. from an earlier run) are skipped.
+    """
+    if not len(next(iter(columns.values()))):
+        return np.array([], dtype=np.int64)
+    now = now or timezone.now()
+    chunk_size = chunk_size or CHUNK_SIZE
+    before = _last_pk(model)
+    if raw:
+        if connection.vendor != "sqlite":
+            raise ValueError("raw inserts are only supported on SQLite")
+        if ages is not None:
+            columns = {**columns, date_field: _timestamps(ages, now)}
+        with transaction.atomic():
+            _executemany(model, columns, now, chunk_size, ignore_conflicts)
+    else:
+        names = list(columns)
+        rows = zip(*(_column(v) for v in columns.values()))
+        objs = [model(**dict(zip(names, row))) for row in rows]
+        with transaction.atomic():
+            for i in range(0, len(objs), chunk_size):
+                model.objects.bulk_create(objs[i:i + chunk_size], batch_size=chunk_size,
+                                          ignore_conflicts=ignore_conflicts)
+    ids = np.array(model.objects.filter(pk__gt=before).order_by("pk").values_list("pk", flat=True), dtype=np.int64)
+    if ages is not None and not raw:
+        # auto_now_add ignores explicit values on insert, spread creation dates afterwards.
+        # Ages are random samples, so when rows were skipped the survivors take the first ones.
+        _spread_dates(model, ids, np.asarray(ages)[:len(ids)], now, field=date_field)
+    return ids
+
+
+def _unique_pairs(a, b):
+    """
+    Drop duplicate (a, b) pairs, keeping first occurrences in their original order.
+    """
+    if not len(a):
+        return a, b
+    keys = a.astype(np.int64) * (int(b.max()) + 1) + b
+    _, first = np.unique(keys, return_index=True)
+    first.sort()
+    return a[first], b[first]
+
+
+def _ages(rng, n, days):
+    return rng.uniform(0, days * 86400, n)
+
+
+def seed_users(n, prefix="user", password=SEED_PASSWORD, raw=False):
+    # one hash for everybody, hashing per row would dominate the load time
+    password_hash = make_password(password)
+    start = _last_pk(User) + 1
+    names = np.char.add(f"{prefix}_", np.arange(start, start + n).astype(str))
+    columns = {
+        "username": names,
+        "email": np.char.add(names, "@example.com"),
+        "password": np.full(n, password_hash, dtype=object),
+    }
+    return _insert(User, columns, raw=raw)
+
+
+def seed_agents(n, rng, raw=False):
+    fields = list(agent_categories_with_subcategories.keys())
+    sub_fields = [agent_categories_with_subcategories[f] for f in fields]
+    styles = np.array([s for s, _ in Agent.AgentStyle.choices], dtype=object)
+
+    field_idx = rng.integers(0, len(fields), n)
+    sub_counts = np.array([len(s) for s in sub_fields])
+    sub_idx = (rng.random(n) * sub_counts[field_idx]).astype(np.int64)
+    # flatten (field, sub_field) so one fancy index picks every sub_field
+    offsets = np.concatenate(([0], np.cumsum(sub_counts)[:-1]))
+    flat_subs = np.array([s for subs in sub_fields for s in subs], dtype=object)
+
+    columns = {
+        "name": np.char.add("agent_", np.arange(n).astype(str)),
+        "field": np.array(fields, dtype=object)[field_idx],
+        "sub_field": flat_subs[offsets[field_idx] + sub_idx],
+        "agent_style": styles[rng.integers(0, len(styles), n)],
+    }
+    return _insert(Agent, columns, raw=raw)
+
+
+def seed_posts(n, agent_ids, rng, days=30, raw=False):
+    agents = Agent.objects.filter(id__in=agent_ids.tolist()).order_by("id").values_list("id", "field", "sub_field")
+    ids, fields, sub_fields = (np.array(col, dtype=object) for col in zip(*agents))
+    pick = rng.integers(0, len(ids), n)
+    columns = {
+        "agent_id": ids[pick],
+        "title": np.char.add("post ", np.arange(n).astype(str)),
+        "text_content": np.full(n, "lorem ipsum " * 20, dtype=object),
+        "field": fields[pick],
+        "sub_field": sub_fields[pick],
+    }
+    return _insert(Post, columns, ages=_ages(rng, n, days), raw=raw)
+
+
+def seed_post_images(post_ids, rng, mean_images=1.0, raw=False):
+    """
+    Attach a Poisson number of images to each post. Every row points at one
+    shared placeholder file so the dataset stays cheap on disk.
+    """
+    if not default_storage.exists(PLACEHOLDER_IMAGE):
+        default_storage.save(PLACEHOLDER_IMAGE, ContentFile(_PLACEHOLDER_PNG))
+    posts = np.repeat(post_ids, rng.poisson(mean_images, len(post_ids)))
+    if not len(posts):
+        return np.array([], dtype=np.int64)
+    columns = {"post_id": posts, "image": np.full(len(posts), PLACEHOLDER_IMAGE, dtype=object)}
+    return _insert(PostImage, columns, raw=raw)
+
+
+def seed_follows(n, user_ids, agent_ids, rng, agent_share=0.7, days=30, raw=False):
+    user_ct, agent_ct = get_content_type("user"), get_content_type("agent")
+    followers = rng.choice(user_ids, n)
+    to_agent = rng.random(n) < agent_share
+    targets = np.where(to_agent, rng.choice(agent_ids, n), rng.choice(user_ids, n))
+    ct_ids = np.where(to_agent, agent_ct.id, user_ct.id)
+
+    keep = to_agent | (followers != targets)
+    followers, targets, ct_ids = followers[keep], targets[keep], ct_ids[keep]
+    # (follower, content type, target) must be unique: fold the type into the target key
+    folded = targets * 2 + (ct_ids == agent_ct.id)
+    followers, folded = _unique_pairs(followers, folded)
+    columns = {
+        "follower_id": followers,
+        "target_content_type_id": np.where(folded % 2 == 1, agent_ct.id, user_ct.id),
+        "target_object_id": folded // 2,
+    }
+    # pairs already in the table (earlier runs) are skipped by the unique constraint
+    return _insert(Follow, columns, ages=_ages(rng, len(followers), days), date_field="follow_date", raw=raw,
+                   ignore_conflicts=True)
+
+
+def seed_likes(n, user_ids, post_ids, rng, days=30, raw=False):
+    # popularity follows a Zipf curve so a few posts collect most likes
+    ranks = np.minimum(rng.zipf(1.3, n), len(post_ids)) - 1
+    users, posts = _unique_pairs(rng.choice(user_ids, n), post_ids[ranks])
+    columns = {"user_id": users, "post_id": posts}
+    return _insert(PostLike, columns, ages=_ages(rng, len(users), days), date_field="liked_at", raw=raw,
+                   ignore_conflicts=True)
+
+
+def seed_comments(n, user_ids, post_ids, rng, days=30, raw=False):
+    """
+    Top-level comments from users addressed to the agent that wrote the post.
+    """
+    user_ct, agent_ct = get_content_type("user"), get_content_type("agent")
+    post_agents = dict(Post.objects.filter(id__in=post_ids.tolist(), agent__isnull=False)
+                       .values_list("id", "agent_id"))
+    posts = np.array(list(post_agents), dtype=np.int64)
+    authors = np.array(list(post_agents.values()), dtype=np.int64)
+    pick = rng.integers(0, len(posts), n)
+    columns = {
+        "post_id": posts[pick],
+        "sender_content_type_id": np.full(n, user_ct.id),
+        "sender_object_id": rng.choice(user_ids, n),
+        "receiver_content_type_id": np.full(n, agent_ct.id),
+        "receiver_object_id": authors[pick],
+        "text": np.char.add("comment ", np.arange(n).astype(str)),
+    }
+    return _insert(Comment, columns, ages=_ages(rng, n, days), raw=raw)
+
+
+def seed_chat_messages(n, user_ids, rng, conversations=None, days=30, raw=False):
+    """
+    n messages spread over `conversations` user pairs (default n // 50).
+    """
+    user_ct = get_content_type("user")
+    conversations = conversations or max(n // 50, 1)
+    pairs = rng.choice(user_ids, (conversations, 2))
+    pick = rng.integers(0, conversations, n)
+    flip = (rng.random(n) < 0.5).astype(np.int64)
+    columns = {
+        "sender_content_type_id": np.full(n, user_ct.id),
+        "sender_object_id": pairs[pick, flip],
+        "receiver_content_type_id": np.full(n, user_ct.id),
+        "receiver_object_id": pairs[pick, 1 - flip],
+        "data": np.char.add("message ", np.arange(n).astype(str)),
+    }
+    return _insert(ChatMessage, columns, ages=_ages(rng, n, days), raw=raw)
+
+
+def _spread_dates(model, ids, ages_seconds, now, field="created_at"):
+    """
+    Rewrite creation timestamps with one UPDATE per distinct day bucket.
+    """
+    buckets = (ages_seconds // 86400).astype(np.int64)
+    for day in np.unique(buckets):
+        chunk = ids[buckets == day]
+        for i in range(0, len(chunk), CHUNK_SIZE):
+            model.objects.filter(pk__in=chunk[i:i + CHUNK_SIZE].tolist()) \
+                         .update(**{field: now - timedelta(days=int(day))})
@@ -1,9 +1,9 @@
 # core/serializers.py
 
 from rest_framework import serializers
-from django.contrib.contenttypes.models import ContentType
 from .models import Agent, Post, PostImage, Story, Follow, ChatMessage, Comment, PostLike
 from django.conf import settings
+from .polymorphic import get_content_type, get_type_name
 
 
 # ------------------ Agent ------------------
@@ -12,7 +12,7 @@ class AgentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Agent
-        fields = ['id', 'name', 'category', 'agent_type', 'description', 'avatar', 'created_at']
+        fields = ['id', 'name', 'field', 'sub_field', 'agent_style', 'description', 'avatar', 'created_at']
 
     def get_avatar(self, obj):
         return obj.get_avatar()
@@ -31,7 +31,7 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'description', 'category', 'agent', 'created_at', 'images']
+        fields = ['id', 'title', 'text_content', 'field', 'sub_field', 'agent', 'created_at', 'images']
 
 
 class PostLikeSerializer(serializers.ModelSerializer):
@@ -44,7 +44,8 @@ class PostLikeSerializer(serializers.ModelSerializer):
 class StorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Story
-        fields = ['id', 'content', 'type', 'created_at']
+        fields = ['id', 'content', 'type', 'created_at', 'expires_at']
+        read_only_fields = ['created_at', 'expires_at']
 
 
 # ------------------ Polymorphic helper ------------------
@@ -54,12 +55,8 @@ class PolymorphicTargetField(serializers.DictField):
     """
     def to_internal_value(self, data):
         data = super().to_internal_value(data)
-        type_map = {
-            'user': ContentType.objects.get(app_label='accounts', model='user'),
-            'agent': ContentType.objects.get(app_label='core', model='agent'),
-        }
         try:
-            ct = type_map[data['type'].lower()]
+            ct = get_content_type(data['type'])
             oid = int(data['id'])
         except Exception:
             raise serializers.ValidationError(
@@ -70,9 +67,7 @@ class PolymorphicTargetField(serializers.DictField):
     def to_representation(self, value):
         if value is None:
             return None
-        model_name = value._meta.model_name
-        type_name = 'user' if model_name == 'user' else 'agent'
-        return {'type': type_name, 'id': value.pk}
+        return {'type': get_type_name(value), 'id': value.pk}
 
 
 # ------------------ Follow ------------------
@@ -110,9 +105,30 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 
 # ------------------ Comment ------------------
 class CommentSerializer(serializers.ModelSerializer):
-    sender = PolymorphicTargetField(read_only=True)
-    receiver = PolymorphicTargetField(read_only=True)
+    """
+    Expects context["actors"]: {(content_type_id, object_id): User|Agent}, built
+    in one query per type by the caller, so sender/receiver never hit the DB per row.
+    """
+    sender = serializers.SerializerMethodField()
+    receiver = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
-        fields = ['id', 'post', 'sender', 'receiver', 'text', 'created_at']
+        fields = ['id', 'post', 'parent', 'sender', 'receiver', 'text', 'reply_count', 'created_at']
+
+    def _actor(self, ct_id, object_id):
+        obj = self.context.get("actors", {}).get((ct_id, object_id))
+        if obj is None:
+            return None
+        return {
+            'type': get_type_name(obj),
+            'id': obj.pk,
+            'name': getattr(obj, 'username', getattr(obj, 'name', '')),
+            'avatar': obj.get_avatar() if hasattr(obj, 'get_avatar') else None,
+        }
+
+    def get_sender(self, obj):
+        return self._actor(obj.sender_content_type_id, obj.sender_object_id)
+
+    def get_receiver(self, obj):
+        return self._actor(obj.receiver_content_type_id, obj.receiver_object_id)
@@ -1,16 +1,32 @@
 # core/services.py
 # core/services.py
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.paginator import Paginator
 from django.contrib.auth import authenticate, get_user_model
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import F, Max, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 import requests
 
-from .models import Agent, Post, PostImage, Story, Follow, ChatMessage, Comment, PostLike
-from .serializers import AgentSerializer, PostSerializer, PostLikeSerializer, CommentSerializer
+from .polymorphic import aget_content_type, get_content_type, get_type_name
+from .routers import read_replica
+from .caching import cached_service
+from . import presence
+from .models import Agent, Post, PostImage, PostScore, Story, Follow, ChatMessage, Comment, PostLike
+from . import cursors, identity, replies, revocation, trending
+from .serializers import AgentSerializer, PostSerializer, PostLikeSerializer, CommentSerializer, StorySerializer
 
 User = get_user_model()
 User = get_user_model()
@@ -30,10 +46,17 @@ def generate_tokens_for_user(user: User) -> TokenPair:
 
 def refresh_access_token(refresh_token_str: str) -> TokenPair:
     try:
-        refresh = RefreshToken(refresh_token_str)
+        refresh = revocation.RevocableRefreshToken(refresh_token_str)
         access_token = str(refresh.access_token)
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            # a token that loses the race to be blacklisted was already used
+            if jwt_settings.BLACKLIST_AFTER_ROTATION and not revocation.revoke(refresh):
+                raise TokenError("Token is blacklisted")
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
         return TokenPair(access_token, str(refresh))
-    except Exception as e:
+    except TokenError as e:
         raise ValueError("Invalid or expired refresh token") from e
 
 # -------------------------------------------------------------------------
@@ -51,34 +74,95 @@ def signup(username: str, email: str, password: str) -> TokenPair:
     return generate_tokens_for_user(user)
 
 
+SOCIAL_USER_CACHE_TTL = getattr(settings, "SOCIAL_USER_CACHE_TTL", 24 * 3600)
+
+
+def _social_user_key(identity):
+    return f"social_user:{identity.provider}:{identity.subject}"
+
+
+def _social_user(identity) -> User:
+    """
+    Returning sign-ins find their user id in the cache and load the user by
+    primary key; get_or_create only runs for new or evicted identities.
+    """
+    key = _social_user_key(identity)
+    user_id = cache.get(key)
+    user = User.objects.filter(pk=user_id).first() if user_id is not None else None
+    if user is None:
+        username = identity.name or identity.email.split("@")[0]
+        user, _ = User.objects.get_or_create(email=identity.email, defaults={"username": username})
+        cache.set(key, user.pk, SOCIAL_USER_CACHE_TTL)
+    return user
+
+
+def _social_tokens(verified) -> TokenPair:
+    return generate_tokens_for_user(_social_user(verified))
+
+
 def social_signup(provider: str, token: str) -> TokenPair:
     """
-    Simplified: call provider API to verify token and get user info
-    Then create or get user and return JWT tokens
+    Verify the provider token (cached until it expires), then get or create
+    the user and return JWT tokens.
     """
-    if provider.lower() == "google":
-        resp = requests.get(
-            "https://www.googleapis.com/oauth2/v3/userinfo",
-            headers={"Authorization": f"Bearer {token}"}
-        )
-        data = resp.json()
-        email = data.get("email")
-        username = data.get("name") or email.split("@")[0]
-    else:
-        raise NotImplementedError("Provider not supported")
-    
-    user, _ = User.objects.get_or_create(email=email, defaults={"username": username})
-    return generate_tokens_for_user(user)
+    return _social_tokens(identity.verify(provider, token))
+
 
+async def asocial_signup(provider: str, token: str) -> TokenPair:
+    return await sync_to_async(_social_tokens)(await identity.averify(provider, token))
 
-def logout(user: User):
-    # In JWT, logout is client-side: remove tokens. You could blacklist refresh token if needed.
-    pass
+
+# Password hashing is CPU bound and releases the GIL (hashlib, argon2-cffi), so
+# async callers hash on a dedicated pool rather than the event loop or the
+# single thread-sensitive executor that serializes all sync ORM work.
+_auth_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "AUTH_HASH_WORKERS", None) or os.cpu_count(),
+    thread_name_prefix="auth-hash",
+)
+
+
+def _on_auth_pool(func):
+    """
+    Run func on the auth pool. Pool threads live as long as the process and
+    Django only recycles connections around requests, so each call closes
+    connections that are broken or past CONN_MAX_AGE, like a request would.
+    """
+    def run(*args):
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False, executor=_auth_executor)
+
+
+async def asignin(username: str, password: str) -> TokenPair:
+    return await _on_auth_pool(signin)(username, password)
+
+
+async def asignup(username: str, email: str, password: str) -> TokenPair:
+    return await _on_auth_pool(signup)(username, email, password)
+
+
+def logout(user: User, refresh_token_str: str):
+    """
+    Revoke the user's refresh token. Access tokens stay valid until they expire.
+    """
+    try:
+        refresh = revocation.RevocableRefreshToken(refresh_token_str)
+    except TokenError:
+        # expired or already revoked
+        return
+    if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(getattr(user, jwt_settings.USER_ID_FIELD)):
+        raise ValueError("Token does not belong to this user")
+    revocation.revoke(refresh)
 
 
 # -------------------------------------------------------------------------
 # Agents
 # -------------------------------------------------------------------------
+@cached_service("agents", timeout=300, models=(Agent,))
+@read_replica
 def get_agents(page_size=20, page_index=1, field=None):
     qs = Agent.objects.all()
     if field:
@@ -106,9 +190,25 @@ def add_agent(name: str, field: str, agent_type: str, description: str = "", ava
     return AgentSerializer(agent).data
 
 
+def get_suggested_agents(user_id, k=10):
+    from .recommendations import get_recommender, popular_agents
+
+    recommender = get_recommender()
+    ranked = recommender.top_k(user_id, k) if recommender else popular_agents(user_id, k)
+    agents = Agent.objects.in_bulk([agent_id for agent_id, _ in ranked])
+    result = []
+    for agent_id, score in ranked:
+        if agent_id in agents:
+            data = AgentSerializer(agents[agent_id]).data
+            data["score"] = round(score, 4)
+            result.append(data)
+    return result
+
+
 # -------------------------------------------------------------------------
 # Users
 # -------------------------------------------------------------------------
+@read_replica
 def get_users(page_size=10, page_index=1):
     qs = User.objects.all()
     paginator = Paginator(qs, page_size)
@@ -120,74 +220,433 @@ def get_user(user_id):
     return User.objects.filter(id=user_id).values("id", "username", "email").first()
 
 
-def get_followers(user_id, page_size=10, page_index=1):
-    qs = Follow.objects.filter(target_content_type=ContentType.objects.get_for_model(User),
-                               target_object_id=user_id)
+def get_presence(user_ids):
+    return [{"id": uid, **state} for uid, state in presence.get_presence(user_ids).items()]
+
+
+# -------------------------------------------------------------------------
+# Follow graph
+# -------------------------------------------------------------------------
+FOLLOWER_COUNT_TTL = 60 * 10
+
+
+def _follower_count_key(ct_id, target_id):
+    return f"follow:count:{ct_id}:{target_id}"
+
+
+def get_followers(target_id, page_size=10, page_index=1, target_type="user"):
+    ct = get_content_type(target_type)
+    qs = (Follow.objects
+          .filter(target_content_type=ct, target_object_id=target_id)
+          .select_related("follower")
+          .order_by("-follow_date"))
     paginator = Paginator(qs, page_size)
     page = paginator.get_page(page_index)
-    return [{"follower_id": f.follower.id, "follow_date": f.follow_date} for f in page]
+    return [{"follower_id": f.follower_id, "username": f.follower.username, "follow_date": f.follow_date}
+            for f in page]
+
+
+def get_following(user_id, page_size=10, page_index=1):
+    qs = (Follow.objects
+          .filter(follower_id=user_id)
+          .select_related("target_content_type")
+          .order_by("-follow_date"))
+    paginator = Paginator(qs, page_size)
+    page = list(paginator.get_page(page_index))
+
+    # Hydrate targets with one query per target type instead of one per row
+    ids_by_model = {}
+    for f in page:
+        model = f.target_content_type.model_class()
+        # stale content type (model removed), nothing to hydrate
+        if model is not None:
+            ids_by_model.setdefault(model, set()).add(f.target_object_id)
+    targets = {}
+    for model, ids in ids_by_model.items():
+        for obj in model.objects.filter(pk__in=ids):
+            targets[(model, obj.pk)] = obj
+
+    result = []
+    for f in page:
+        obj = targets.get((f.target_content_type.model_class(), f.target_object_id))
+        if obj is None:
+            continue
+        result.append({
+            "type": get_type_name(obj),
+            "id": obj.pk,
+            "name": getattr(obj, "username", getattr(obj, "name", "")),
+            "follow_date": f.follow_date,
+        })
+    return result
+
+
+def get_follower_count(target_id, target_type="user"):
+    ct = get_content_type(target_type)
+    key = _follower_count_key(ct.id, target_id)
+    count = cache.get(key)
+    if count is None:
+        count = Follow.objects.filter(target_content_type=ct, target_object_id=target_id).count()
+        cache.set(key, count, FOLLOWER_COUNT_TTL)
+    return count
+
+
+def get_follow_status(user_id, targets):
+    """
+    Bulk "does user_id follow these targets" check.
+    targets: iterable of (type_name, id). Returns {(type_name, id): bool} in one query.
+    """
+    targets = [(t.lower(), int(i)) for t, i in targets]
+    ids_by_ct = {}
+    for type_name, oid in targets:
+        ids_by_ct.setdefault(get_content_type(type_name).id, set()).add(oid)
+
+    condition = Q()
+    for ct_id, ids in ids_by_ct.items():
+        condition |= Q(target_content_type_id=ct_id, target_object_id__in=ids)
+    followed = set()
+    if ids_by_ct:
+        followed = set(Follow.objects
+                       .filter(condition, follower_id=user_id)
+                       .values_list("target_content_type_id", "target_object_id"))
+    return {(t, i): (get_content_type(t).id, i) in followed for t, i in targets}
+
+
+def get_mutual_follows(user_id, page_size=10, page_index=1):
+    """
+    Users that user_id follows and who follow user_id back.
+    """
+    user_ct = get_content_type("user")
+    followers = Follow.objects.filter(
+        target_content_type=user_ct, target_object_id=user_id
+    ).values("follower_id")
+    qs = (Follow.objects
+          .filter(follower_id=user_id, target_content_type=user_ct, target_object_id__in=followers)
+          .order_by("-follow_date")
+          .values_list("target_object_id", flat=True))
+    paginator = Paginator(qs, page_size)
+    ids = list(paginator.get_page(page_index))
+    users = User.objects.in_bulk(ids)
+    return [{"id": uid, "username": users[uid].username} for uid in ids if uid in users]
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def _invalidate_follower_count(sender, instance, **kwargs):
+    cache.delete(_follower_count_key(instance.target_content_type_id, instance.target_object_id))
 
 
 # -------------------------------------------------------------------------
 # Chats
 # -------------------------------------------------------------------------
 
+def _discussion_receivers(user_ct, user_id):
+    """
+    Distinct (content_type_id, object_id) receivers of a user's messages, most recent first.
+    """
+    return (ChatMessage.objects.filter(sender_content_type=user_ct, sender_object_id=user_id)
+            .values_list("receiver_content_type_id", "receiver_object_id")
+            .annotate(last_at=Max("created_at")).order_by("-last_at"))
+
+
+def _discussion_entries(rows, actors):
+    entries = []
+    for ct_id, oid, _ in rows:
+        receiver_obj = actors.get((ct_id, oid))
+        if receiver_obj is None:
+            continue
+        entries.append({
+            "id": oid,
+            "type": get_type_name(receiver_obj),
+            "name": getattr(receiver_obj, "username", getattr(receiver_obj, "name", "")),
+            # avatar for agents, empty for regular users
+            "avatar": getattr(receiver_obj, "get_avatar", lambda: None)(),
+        })
+    return entries
+
+
+@read_replica
 def get_discussions(user_id):
-    user_ct = ContentType.objects.get_for_model(User)
-    
-    # Get all chat messages where the user is the sender
-    qs = ChatMessage.objects.filter(
-        sender_content_type=user_ct,
-        sender_object_id=user_id
-    ).select_related('receiver_content_type')  # optional for efficiency
-
-    # Use a set to avoid duplicates
-    receivers = {}
-    for c in qs:
-        receiver_obj = c.receiver
-        if receiver_obj:
-            rid = receiver_obj.id
-            if rid not in receivers:
-                # Determine avatar for agents, empty for regular users
-                avatar = getattr(receiver_obj, 'get_avatar', lambda: None)()
-                receivers[rid] = {
-                    "id": rid,
-                    "name": getattr(receiver_obj, "username", getattr(receiver_obj, "name", "")),
-                    "avatar": avatar
-                }
-
-    # Return list of unique receivers
-    return list(receivers.values())
-
-def get_discussion_chats(sender_id, receiver_id):
-    user_ct = ContentType.objects.get_for_model(User)
+    rows = list(_discussion_receivers(get_content_type('user'), user_id))
+    return _discussion_entries(rows, load_actors([(ct_id, oid) for ct_id, oid, _ in rows]))
+
+
+@read_replica
+async def aget_discussions(user_id):
+    rows = [row async for row in _discussion_receivers(await aget_content_type('user'), user_id)]
+    return _discussion_entries(rows, await aload_actors([(ct_id, oid) for ct_id, oid, _ in rows]))
+
+
+def _discussion_chats_qs(user_ct, receiver_ct, sender_id, receiver_id):
     qs = ChatMessage.objects.filter(
         sender_content_type=user_ct, sender_object_id=sender_id,
-        receiver_content_type=user_ct, receiver_object_id=receiver_id
+        receiver_content_type=receiver_ct, receiver_object_id=receiver_id
     ) | ChatMessage.objects.filter(
-        sender_content_type=user_ct, sender_object_id=receiver_id,
+        sender_content_type=receiver_ct, sender_object_id=receiver_id,
         receiver_content_type=user_ct, receiver_object_id=sender_id
     )
-    return [{"id": c.id, "type": c.type, "text": c.text} for c in qs.order_by("created_at")]
+    return qs.order_by("created_at")
+
+
+def _chat_entry(c, user_ct, sender_id):
+    return {"id": c.id, "type": c.type, "text": c.data,
+            "from_me": c.sender_content_type_id == user_ct.id and c.sender_object_id == sender_id}
+
+
+@read_replica
+def get_discussion_chats(sender_id, receiver_id, receiver_type="user"):
+    user_ct = get_content_type('user')
+    qs = _discussion_chats_qs(user_ct, get_content_type(receiver_type), sender_id, receiver_id)
+    return [_chat_entry(c, user_ct, sender_id) for c in qs]
+
+
+@read_replica
+async def aget_discussion_chats(sender_id, receiver_id, receiver_type="user"):
+    user_ct = await aget_content_type('user')
+    qs = _discussion_chats_qs(user_ct, await aget_content_type(receiver_type), sender_id, receiver_id)
+    return [_chat_entry(c, user_ct, sender_id) async for c in qs.aiterator(chunk_size=500)]
 
 
 # -------------------------------------------------------------------------
 # Posts & Comments
 # -------------------------------------------------------------------------
-def get_posts(page_size=20, page_index=1, field=None, sort_date_up=False):
-    qs = Post.objects.all()
+def _posts_qs(field=None, sort_date_up=False):
+    qs = Post.objects.select_related("agent").prefetch_related("images")
     if field:
         qs = qs.filter(field=field)
-    if sort_date_up:
-        qs = qs.order_by("created_at")
-    else:
-        qs = qs.order_by("-created_at")
-    paginator = Paginator(qs, page_size)
+    return qs.order_by("created_at" if sort_date_up else "-created_at")
+
+
+@read_replica
+def get_posts(page_size=20, page_index=1, field=None, sort_date_up=False):
+    paginator = Paginator(_posts_qs(field, sort_date_up), page_size)
     page = paginator.get_page(page_index)
     return PostSerializer(page, many=True).data
 
 
+@read_replica
+async def aget_posts(page_size=20, page_index=1, field=None, sort_date_up=False):
+    """
+    Same page semantics as get_posts (out of range indexes clamp like Paginator.get_page).
+    """
+    qs = _posts_qs(field, sort_date_up)
+    page_size = int(page_size)
+    try:
+        page_index = max(int(page_index), 1)
+    except (TypeError, ValueError):
+        page_index = 1
+    pages = max(-(-await qs.acount() // page_size), 1)
+    offset = (min(page_index, pages) - 1) * page_size
+    posts = [p async for p in qs[offset:offset + page_size].aiterator(chunk_size=page_size)]
+    return PostSerializer(posts, many=True).data
+
+
+def get_trending_posts(page_size=20, cursor=None, field=None):
+    """
+    Posts ranked by the precomputed trending score, keyset-paginated on (score, id).
+    """
+    page_size = int(page_size)
+    if not 1 <= page_size <= 100:
+        raise ValueError("page_size must be between 1 and 100")
+    qs = PostScore.objects.all()
+    if field:
+        qs = qs.filter(field=field)
+    qs = trending.after_cursor(qs, cursor).order_by("-score", "-post_id")
+    scores = list(qs.values_list("post_id", "score")[:page_size])
+
+    posts = Post.objects.select_related("agent").prefetch_related("images").in_bulk([pid for pid, _ in scores])
+    results = [PostSerializer(posts[pid]).data for pid, _ in scores if pid in posts]
+    next_cursor = trending.encode_cursor(scores[-1][1], scores[-1][0]) if len(scores) == page_size else None
+    return {"results": results, "next_cursor": next_cursor}
+
+
+
+def load_actors(pairs):
+    """
+    Bulk-resolve polymorphic (content_type_id, object_id) pairs, one query per type.
+    """
+    ids_by_ct = {}
+    for ct_id, oid in pairs:
+        ids_by_ct.setdefault(ct_id, set()).add(oid)
+    actors = {}
+    for ct_id, ids in ids_by_ct.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        for pk, obj in model.objects.in_bulk(ids).items():
+            actors[(ct_id, pk)] = obj
+    return actors
+
+
+async def aload_actors(pairs):
+    ids_by_ct = {}
+    for ct_id, oid in pairs:
+        ids_by_ct.setdefault(ct_id, set()).add(oid)
+    actors = {}
+    for ct_id, ids in ids_by_ct.items():
+        model = (await sync_to_async(ContentType.objects.get_for_id)(ct_id)).model_class()
+        for pk, obj in (await model.objects.ain_bulk(ids)).items():
+            actors[(ct_id, pk)] = obj
+    return actors
+
+
+def _comment_page_qs(qs, page_size, cursor):
+    if cursor:
+        created_at, comment_id = cursors.decode_cursor(cursor, datetime.fromisoformat, int)
+        qs = qs.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=comment_id))
+    return qs.order_by("created_at", "id")[:page_size]
+
+
+def _actor_pairs(comments):
+    pairs = [(c.sender_content_type_id, c.sender_object_id) for c in comments]
+    return pairs + [(c.receiver_content_type_id, c.receiver_object_id) for c in comments]
+
+
+def _comment_results(comments, actors, page_size):
+    results = CommentSerializer(comments, many=True, context={"actors": actors}).data
+    next_cursor = None
+    if len(comments) == page_size:
+        next_cursor = cursors.encode_cursor(comments[-1].created_at.isoformat(), comments[-1].id)
+    return {"results": results, "next_cursor": next_cursor}
+
+
+def _comment_page(qs, page_size, cursor):
+    page_size = int(page_size)
+    comments = list(_comment_page_qs(qs, page_size, cursor))
+    return _comment_results(comments, load_actors(_actor_pairs(comments)), page_size)
 
-def get_post_comments(post_id):
-    qs = Comment.objects.filter(post_id=post_id).order_by("created_at")
-    return CommentSerializer(qs, many=True).data
+
+async def _acomment_page(qs, page_size, cursor):
+    page_size = int(page_size)
+    comments = [c async for c in _comment_page_qs(qs, page_size, cursor)]
+    return _comment_results(comments, await aload_actors(_actor_pairs(comments)), page_size)
+
+
+@cached_service("post_comments", timeout=60, models=(Comment,))
+@read_replica
+def get_post_comments(post_id, page_size=20, cursor=None):
+    """
+    Top-level comments of a post, oldest first, keyset-paginated on (created_at, id).
+    """
+    qs = Comment.objects.filter(post_id=post_id, parent__isnull=True)
+    return _comment_page(qs, page_size, cursor)
+
+
+@cached_service("post_comments", timeout=60, models=(Comment,))
+@read_replica
+async def aget_post_comments(post_id, page_size=20, cursor=None):
+    qs = Comment.objects.filter(post_id=post_id, parent__isnull=True)
+    return await _acomment_page(qs, page_size, cursor)
+
+
+@cached_service("comment_replies", timeout=60, models=(Comment,))
+@read_replica
+def get_comment_replies(comment_id, page_size=20, cursor=None):
+    qs = Comment.objects.filter(parent_id=comment_id)
+    return _comment_page(qs, page_size, cursor)
+
+
+def add_comment(post_id, sender_type, sender_id, text, parent_id=None):
+    """
+    Top-level comments address the post's agent, replies address the
+    author of the parent comment.
+    """
+    post = Post.objects.only("id", "agent_id").get(id=post_id)
+    parent = None
+    if parent_id:
+        parent = Comment.objects.get(id=parent_id, post_id=post_id)
+        # keep threads one level deep
+        if parent.parent_id:
+            parent = Comment.objects.get(id=parent.parent_id)
+        receiver_ct_id, receiver_id = parent.sender_content_type_id, parent.sender_object_id
+    elif post.agent_id:
+        receiver_ct_id, receiver_id = get_content_type("agent").id, post.agent_id
+    else:
+        raise ValueError("Post has no agent to address")
+
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            post=post,
+            parent=parent,
+            sender_content_type=get_content_type(sender_type),
+            sender_object_id=sender_id,
+            receiver_content_type_id=receiver_ct_id,
+            receiver_object_id=receiver_id,
+            text=text,
+        )
+        if parent:
+            Comment.objects.filter(id=parent.id).update(reply_count=F("reply_count") + 1)
+        replies.enqueue(comment)
+    actors = load_actors([(comment.sender_content_type_id, comment.sender_object_id),
+                          (receiver_ct_id, receiver_id)])
+    return CommentSerializer(comment, context={"actors": actors}).data
+
+
+# -------------------------------------------------------------------------
+# Stories
+# -------------------------------------------------------------------------
+STORY_PURGE_BATCH = 5000
+
+
+def add_story(owner_type: str, owner_id: int, content: str, story_type: str = Story.StoryType.TEXT):
+    if story_type not in Story.StoryType.values:
+        raise ValueError(f"type must be one of {', '.join(Story.StoryType.values)}")
+    story = Story.objects.create(
+        owner_content_type=get_content_type(owner_type),
+        owner_object_id=owner_id,
+        content=content,
+        type=story_type,
+    )
+    return StorySerializer(story).data
+
+
+def get_owner_stories(owner_type: str, owner_id: int):
+    qs = Story.objects.filter(
+        owner_content_type=get_content_type(owner_type),
+        owner_object_id=owner_id,
+        expires_at__gt=timezone.now(),
+    ).order_by("created_at")
+    return StorySerializer(qs, many=True).data
+
+
+def get_feed_stories(user_id):
+    """
+    Live stories of every user/agent that user_id follows, in one query,
+    grouped by owner (owners with the most recent story first).
+    """
+    followed = Follow.objects.filter(follower_id=user_id) \
+                             .values_list("target_content_type_id", "target_object_id")
+    ids_by_ct = {}
+    for ct_id, oid in followed:
+        ids_by_ct.setdefault(ct_id, []).append(oid)
+    if not ids_by_ct:
+        return []
+
+    condition = Q()
+    for ct_id, ids in ids_by_ct.items():
+        condition |= Q(owner_content_type_id=ct_id, owner_object_id__in=ids)
+    qs = Story.objects.filter(condition, expires_at__gt=timezone.now()) \
+                      .select_related("owner_content_type") \
+                      .order_by("owner_content_type_id", "owner_object_id", "created_at")
+
+    groups = {}
+    for story in qs:
+        key = (story.owner_content_type_id, story.owner_object_id)
+        if key not in groups:
+            groups[key] = {
+                "owner": {"type": get_type_name(story.owner_content_type.model_class()), "id": story.owner_object_id},
+                "stories": [],
+            }
+        groups[key]["stories"].append(StorySerializer(story).data)
+    return sorted(groups.values(), key=lambda g: g["stories"][-1]["created_at"], reverse=True)
+
+
+def purge_expired_stories():
+    """
+    Cron entry point: delete expired stories in bounded batches.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(Story.objects.filter(expires_at__lte=now).values_list("id", flat=True)[:STORY_PURGE_BATCH])
+        if not ids:
+            break
+        # No dependent rows or signals, so Django issues a single DELETE per batch
+        deleted += Story.objects.filter(id__in=ids).delete()[0]
+    print(f"Purged {deleted} expired stories")
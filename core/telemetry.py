@@ -0,0 +1,188 @@
+# core/telemetry.py
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .models import GenerationCall
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------------
+# Generation telemetry
+# -------------------------------------------------------------------------
+# TelemetryHandler is a LangChain callback attached to every chat/image model
+# we build. Finished calls are buffered in memory and written to
+# GenerationCall with bulk_create once TELEMETRY_FLUSH_SIZE calls or
+# TELEMETRY_FLUSH_INTERVAL seconds have accumulated (and at exit).
+
+TELEMETRY_FLUSH_SIZE = getattr(settings, "TELEMETRY_FLUSH_SIZE", 50)
+TELEMETRY_FLUSH_INTERVAL = getattr(settings, "TELEMETRY_FLUSH_INTERVAL", 30)
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_buffer = []
+_buffer_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record(call):
+    with _buffer_lock:
+        _buffer.append(call)
+        due = len(_buffer) >= TELEMETRY_FLUSH_SIZE or time.monotonic() - _last_flush > TELEMETRY_FLUSH_INTERVAL
+    if due:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            flush()
+        else:
+            # the ORM is sync-only, write from a worker thread
+            loop.run_in_executor(None, flush)
+
+
+def flush():
+    global _last_flush
+    with _buffer_lock:
+        rows, _buffer[:] = list(_buffer), []
+        _last_flush = time.monotonic()
+    if not rows:
+        return 0
+    try:
+        GenerationCall.objects.bulk_create(rows, batch_size=500)
+    except Exception as e:
+        logger.warning("Dropping %d generation telemetry rows: %s", len(rows), e)
+        return 0
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            close_old_connections()
+    return len(rows)
+
+
+atexit.register(flush)
+
+
+def _usage(response):
+    """
+    Token usage from either llm_output or the generated message's usage_metadata.
+    """
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    input_tokens = usage.get("prompt_tokens") or usage.get("input_tokens") or 0
+    output_tokens = usage.get("completion_tokens") or usage.get("output_tokens") or 0
+    if not (input_tokens or output_tokens):
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += metadata.get("input_tokens", 0)
+                output_tokens += metadata.get("output_tokens", 0)
+    return input_tokens, output_tokens
+
+
+def _image_count(response):
+    count = 0
+    for generations in response.generations:
+        for generation in generations:
+            content = getattr(getattr(generation, "message", None), "content", None)
+            if isinstance(content, list):
+                count += sum(1 for part in content if isinstance(part, dict) and "image_url" in part)
+    return count
+
+
+class TelemetryHandler(BaseCallbackHandler):
+    def __init__(self, operation, model_name, kind=GenerationCall.Kind.TEXT):
+        self.operation = operation
+        self.model_name = model_name
+        self.kind = kind
+        self._runs = {}
+
+    def _start(self, run_id):
+        self._runs[run_id] = {"started_at": timezone.now(), "t0": time.perf_counter(), "retries": 0}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        if run_id in self._runs:
+            self._runs[run_id]["retries"] += 1
+
+    def _finish(self, run_id, **fields):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        record(GenerationCall(
+            operation=self.operation,
+            kind=self.kind,
+            model_name=self.model_name,
+            started_at=run["started_at"],
+            latency_ms=int((time.perf_counter() - run["t0"]) * 1000),
+            retries=run["retries"],
+            **fields,
+        ))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens, output_tokens = _usage(response)
+        self._finish(run_id, input_tokens=input_tokens, output_tokens=output_tokens,
+                     images=_image_count(response) if self.kind == GenerationCall.Kind.IMAGE else 0)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        logger.warning("%s call to %s failed: %s", self.operation, self.model_name, error)
+        self._finish(run_id, success=False, error=str(error)[:2000])
+
+
+# -------------------------------------------------------------------------
+# Prometheus exposition
+# -------------------------------------------------------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_metrics():
+    """
+    Cumulative counters and latency histogram over every recorded call,
+    aggregated from GenerationCall so every worker and cron process is covered.
+    Windows are left to PromQL (rate(), histogram_quantile()).
+    """
+    bucket_aggregates = {f"le_{b}": Count("id", filter=Q(latency_ms__lte=b)) for b in LATENCY_BUCKETS_MS}
+    rows = (GenerationCall.objects
+            .values("operation", "model_name", "kind")
+            .annotate(calls=Count("id"), failures=Count("id", filter=Q(success=False)),
+                      latency_sum=Sum("latency_ms"), input_tokens=Sum("input_tokens"),
+                      output_tokens=Sum("output_tokens"), retries=Sum("retries"), images=Sum("images"),
+                      **bucket_aggregates)
+            .order_by("operation", "model_name"))
+
+    lines = []
+    series = [
+        ("calls", "Generation calls"),
+        ("failures", "Failed generation calls"),
+        ("retries", "Retries issued by the provider client"),
+        ("input_tokens", "Prompt tokens"),
+        ("output_tokens", "Completion tokens"),
+        ("images", "Images produced"),
+    ]
+    for name, help_text in series:
+        lines.append(f"# HELP ai_net_generation_{name}_total {help_text}")
+        lines.append(f"# TYPE ai_net_generation_{name}_total counter")
+        for row in rows:
+            labels = f'operation="{_escape(row["operation"])}",model="{_escape(row["model_name"])}",kind="{row["kind"]}"'
+            lines.append(f"ai_net_generation_{name}_total{{{labels}}} {row[name] or 0}")
+
+    lines.append("# HELP ai_net_generation_latency_ms Generation latency")
+    lines.append("# TYPE ai_net_generation_latency_ms histogram")
+    for row in rows:
+        labels = f'operation="{_escape(row["operation"])}",model="{_escape(row["model_name"])}",kind="{row["kind"]}"'
+        for b in LATENCY_BUCKETS_MS:
+            lines.append(f'ai_net_generation_latency_ms_bucket{{{labels},le="{b}"}} {row[f"le_{b}"]}')
+        lines.append(f'ai_net_generation_latency_ms_bucket{{{labels},le="+Inf"}} {row["calls"]}')
+        lines.append(f"ai_net_generation_latency_ms_sum{{{labels}}} {row['latency_sum'] or 0}")
+        lines.append(f"ai_net_generation_latency_ms_count{{{labels}}} {row['calls']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+
+from core import llm
+from core.consumers import AgentChatConsumer
+from core.models import Agent, ChatMessage
+from core.polymorphic import get_content_type
+
+User = get_user_model()
+
+
+@mock.patch.object(llm, "AGENT_CHAT_MODEL", "fake")
+class AgentChatConsumerTests(TransactionTestCase):
+    """
+    User <-> agent chat against the local fake chat model.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="reader", email="reader@example.com", password="x")
+        self.agent = Agent.objects.create(name="Ada", field=Agent.AgentField.SCIENCE, sub_field="Physics")
+
+    async def connect(self, query=""):
+        path = f"/ws/chat/agent/{self.agent.id}/" + (f"?{query}" if query else "")
+        communicator = WebsocketCommunicator(AgentChatConsumer.as_asgi(), path)
+        communicator.scope["user"] = self.user
+        communicator.scope["url_route"] = {"kwargs": {"agent_id": str(self.agent.id)}}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def events_until_reply(self, communicator):
+        events = []
+        while not events or events[-1]["type"] != "agent_message":
+            events.append(await communicator.receive_json_from(timeout=5))
+        return events
+
+    @database_sync_to_async
+    def messages(self, sender_type):
+        return list(ChatMessage.objects.filter(sender_content_type=get_content_type(sender_type))
+                    .values_list("data", flat=True))
+
+    async def test_reply_is_streamed_then_saved(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({"type": "TEXT", "data": "What is entropy?"})
+        events = await self.events_until_reply(communicator)
+        await communicator.disconnect()
+
+        self.assertEqual(events[0]["type"], "chat_message")
+        tokens = "".join(e["token"] for e in events if e["type"] == "agent_token")
+        self.assertEqual(tokens, llm.FAKE_REPLIES[0])
+        self.assertEqual(events[-1]["data"], llm.FAKE_REPLIES[0])
+        self.assertEqual(await self.messages("user"), ["What is entropy?"])
+        self.assertEqual(await self.messages("agent"), [llm.FAKE_REPLIES[0]])
+
+    async def test_one_reply_in_flight_per_socket(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({"type": "TEXT", "data": "first"})
+        await communicator.send_json_to({"type": "TEXT", "data": "second"})
+        events = await self.events_until_reply(communicator)
+
+        self.assertIn("agent_reply_pending", [e["type"] for e in events])
+        self.assertEqual(await self.messages("user"), ["first"])
+
+        # the socket takes a new message once the reply is done
+        await communicator.send_json_to({"type": "TEXT", "data": "third"})
+        await self.events_until_reply(communicator)
+        await communicator.disconnect()
+        self.assertEqual(await self.messages("user"), ["first", "third"])
+        self.assertEqual(len(await self.messages("agent")), 2)
+
+    async def test_plain_connection_keeps_the_original_protocol(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({"type": "TEXT", "data": "hello"})
+        events = await self.events_until_reply(communicator)
+        await communicator.disconnect()
+
+        # no handshake frame, full chat_message payload
+        self.assertEqual(events[0]["type"], "chat_message")
+        self.assertEqual(events[0]["sender"], self.user.username)
+        self.assertEqual(events[0]["receiver_id"], self.agent.id)
+        self.assertNotIn("sender_id", events[0])
+
+    async def test_opted_in_connection_gets_hello_and_compact_events(self):
+        communicator = await self.connect("batch=1")
+        self.assertEqual(await communicator.receive_json_from(),
+                         {"type": "chat_hello", "encoding": "json", "batch": True})
+        await communicator.send_json_to({"type": "TEXT", "data": "hello"})
+        frame = await communicator.receive_json_from(timeout=5)
+        await communicator.disconnect()
+
+        message = frame["events"][0]
+        self.assertEqual(message["type"], "chat_message")
+        self.assertEqual(message["sender_id"], self.user.id)
+        self.assertNotIn("sender", message)
+        self.assertNotIn("receiver_id", message)
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import context
+from core.models import Agent, ChatMessage
+from core.polymorphic import get_content_type
+
+User = get_user_model()
+
+
+class ContextWindowTests(TestCase):
+    """
+    Every message of a conversation is either folded into the summary or sent
+    in the prompt, whatever the backlog after the watermark.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="talker", email="talker@example.com", password="x")
+        self.agent = Agent.objects.create(name="Ada", field=Agent.AgentField.SCIENCE, sub_field="Physics")
+
+    def say(self, text):
+        ChatMessage.objects.create(
+            sender_content_type=get_content_type("user"), sender_object_id=self.user.id,
+            receiver_content_type=get_content_type("agent"), receiver_object_id=self.agent.id,
+            type=ChatMessage.MessageType.TEXT, data=text,
+        )
+
+    def fold_pending(self):
+        # stand-in summarizer: the summary lists every folded message
+        pending = context.pending_summary_batch(self.user.id, self.agent.id)
+        if pending is None:
+            return False
+        state, up_to, history = pending
+        summary = " ".join([state.summary, *(text for _, text in history)]).strip()
+        self.assertEqual(context.save_summary(state, summary, up_to), 1)
+        return True
+
+    def test_every_message_reaches_summary_or_prompt(self):
+        limit = context.CONTEXT_WINDOW + context.SUMMARY_BATCH
+        folds = 0
+        for n in range(1, limit + 6):
+            self.say(f"m{n}")
+            # a turn: build the prompt, then fold like AgentChatConsumer.update_summary
+            summary, history = context.get_context(self.user.id, self.agent.id)
+            seen = summary.split() + [text for _, text in history]
+            self.assertEqual(sorted(seen), sorted(f"m{i}" for i in range(1, n + 1)), f"after {n} messages")
+            self.assertGreaterEqual(len(history), min(n, context.CONTEXT_WINDOW))
+            self.assertLessEqual(len(history), limit)
+            folds += self.fold_pending()
+        self.assertEqual(folds, 1)
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from django.test import TransactionTestCase
+
+
+class SQLiteConcurrentWritersTests(TransactionTestCase):
+    """
+    Writers racing each other and readers on a file database opened with the
+    sqlite profile from settings, PRAGMAs applied by core.db.
+    """
+    writers = 8
+    transactions = 20
+    rows_per_transaction = 200
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = dict(settings.DATABASE_PROFILES["sqlite"], NAME=os.path.join(tmp.name, "stress.sqlite3"))
+        # connections are per thread, like the web and worker processes
+        self.handler = ConnectionHandler({"default": config})
+        self.addCleanup(self.handler.close_all)
+        with self.handler["default"].cursor() as cursor:
+            cursor.execute("CREATE TABLE message (id INTEGER PRIMARY KEY, writer INTEGER, body TEXT)")
+
+    def run_threads(self, target, count):
+        errors = []
+        start = threading.Barrier(count)
+
+        def run(n):
+            try:
+                start.wait()
+                target(n)
+            except OperationalError as e:
+                errors.append(e)
+            finally:
+                self.handler["default"].close()
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(count)]
+        for t in threads:
+            t.start()
+        return threads, errors
+
+    def test_wal_and_driver_busy_timeout(self):
+        with self.handler["default"].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], int(settings.SQLITE_BUSY_TIMEOUT * 1000))
+
+    def test_concurrent_writers_do_not_lock(self):
+        stop = threading.Event()
+        reads = []
+
+        def write(n):
+            with self.handler["default"].cursor() as cursor:
+                for _ in range(self.transactions):
+                    cursor.execute(f"BEGIN {settings.DATABASE_PROFILES['sqlite']['OPTIONS']['transaction_mode']}")
+                    cursor.executemany("INSERT INTO message (writer, body) VALUES (%s, %s)",
+                                       [(n, "x" * 200)] * self.rows_per_transaction)
+                    cursor.execute("COMMIT")
+
+        def read(_):
+            # WAL readers see committed snapshots while a writer holds the lock
+            with self.handler["default"].cursor() as cursor:
+                while not stop.is_set():
+                    cursor.execute("SELECT COUNT(*) FROM message")
+                    reads.append(cursor.fetchone()[0])
+
+        readers, read_errors = self.run_threads(read, 2)
+        writers, write_errors = self.run_threads(write, self.writers)
+        for t in writers:
+            t.join()
+        stop.set()
+        for t in readers:
+            t.join()
+
+        self.assertEqual(write_errors + read_errors, [])
+        self.assertTrue(reads)
+        with self.handler["default"].cursor() as cursor:
+            cursor.execute("SELECT writer, COUNT(*) FROM message GROUP BY writer")
+            self.assertEqual(dict(cursor.fetchall()),
+                             {n: self.transactions * self.rows_per_transaction for n in range(self.writers)})
@@ -0,0 +1,127 @@
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import identity
+from core.management.commands.social_stub_server import make_handler
+
+User = get_user_model()
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "identity-tests"}}
+
+
+@override_settings(CACHES=LOCMEM, ROOT_URLCONF="core.urls")
+class StubProviderTests(TestCase):
+    """
+    Social sign-in against the local userinfo stub (manage.py social_stub_server).
+    """
+    # identities expire EXPIRY_SKEW before the provider's expires_in, one second here
+    expires_in = identity.EXPIRY_SKEW + 1
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        handler = make_handler(0, cls.expires_in)
+        cls.requests = []
+
+        class CountingHandler(handler):
+            def do_GET(self):
+                cls.requests.append(self.headers.get("Authorization"))
+                super().do_GET()
+
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{cls.server.server_port}/userinfo"
+        cls.providers = mock.patch.dict(identity._providers, {"stub": identity.OAuthProvider("stub", url)})
+        cls.providers.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.providers.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.requests.clear()
+
+    def test_verify_returns_the_provider_identity(self):
+        verified = identity.verify("stub", "token-a")
+        self.assertTrue(verified.email.endswith("@stub.local"))
+        self.assertEqual(verified.provider, "stub")
+        self.assertEqual(verified.expires_in, self.expires_in)
+        self.assertEqual(self.requests, ["Bearer token-a"])
+
+    def test_verified_identity_is_cached_per_token(self):
+        first = identity.verify("stub", "token-b")
+        second = identity.verify("stub", "token-b")
+        identity.verify("stub", "token-c")
+        self.assertEqual(first.subject, second.subject)
+        self.assertEqual(self.requests, ["Bearer token-b", "Bearer token-c"])
+
+    def test_cached_identity_expires_before_the_token(self):
+        identity.verify("stub", "token-d")
+        time.sleep(1.2)
+        identity.verify("stub", "token-d")
+        self.assertEqual(len(self.requests), 2)
+
+    def test_invalid_token_raises(self):
+        with self.assertRaises(identity.IdentityError):
+            identity.verify("stub", "invalid-token")
+
+    def test_signup_issues_tokens_and_reuses_the_user(self):
+        client = APIClient()
+        first = client.post("/auth/social/stub/", {"token": "token-e"}, format="json")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(set(first.json()), {"access", "refresh"})
+
+        # returning sign-ins go through the cached user id, not the email
+        user = User.objects.get(email__endswith="@stub.local")
+        User.objects.filter(pk=user.pk).update(email="changed@example.com")
+        with self.assertNumQueries(1):
+            second = client.post("/auth/social/stub/", {"token": "token-e"}, format="json")
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(AccessToken(second.json()["access"])["user_id"], str(user.pk))
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_signup_errors(self):
+        client = APIClient()
+        self.assertEqual(client.post("/auth/social/stub/", {"token": "invalid"}, format="json").status_code, 401)
+        self.assertEqual(client.post("/auth/social/stub/", {}, format="json").status_code, 400)
+        self.assertEqual(client.post("/auth/social/nope/", {"token": "x"}, format="json").status_code, 404)
+
+    async def test_averify_shares_the_cache_with_verify(self):
+        first = await identity.averify("stub", "token-f")
+        second = await identity.averify("stub", "token-f")
+        self.assertEqual(first.subject, second.subject)
+        self.assertEqual(self.requests, ["Bearer token-f"])
+        with self.assertRaises(identity.IdentityError):
+            await identity.averify("stub", "invalid-token")
+
+    async def test_async_signup_issues_tokens(self):
+        client = AsyncClient()
+        first = await client.post("/async/auth/social/stub/", {"token": "token-g"}, content_type="application/json")
+        second = await client.post("/async/auth/social/stub/", {"token": "token-g"}, content_type="application/json")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(set(first.json()), {"access", "refresh"})
+        user_ids = {AccessToken(response.json()["access"])["user_id"] for response in (first, second)}
+        self.assertEqual(len(user_ids), 1)
+        self.assertEqual(await User.objects.acount(), 1)
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_async_signup_errors(self):
+        client = AsyncClient()
+
+        async def post(path, data):
+            return (await client.post(path, data, content_type="application/json")).status_code
+
+        self.assertEqual(await post("/async/auth/social/stub/", {"token": "invalid"}), 401)
+        self.assertEqual(await post("/async/auth/social/stub/", {}), 400)
+        self.assertEqual(await post("/async/auth/social/nope/", {"token": "x"}), 404)
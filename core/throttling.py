@@ -0,0 +1,40 @@
+# core/throttling.py
+
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# -------------------------------------------------------------------------
+# Auth throttles
+# -------------------------------------------------------------------------
+# DRF checks throttles before the view runs, so abusive bursts are rejected
+# before any password is hashed. Rates live in
+# REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] under the scopes below.
+
+class LoginIPThrottle(SimpleRateThrottle):
+    """
+    Attempts per client address, across all usernames.
+    """
+    scope = "login_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class LoginUsernameThrottle(SimpleRateThrottle):
+    """
+    Attempts per target username, across all addresses.
+    """
+    scope = "login_username"
+
+    def get_cache_key(self, request, view):
+        username = request.data.get("username") if hasattr(request.data, "get") else None
+        if not username:
+            return None
+        ident = hashlib.sha256(str(username).strip().lower().encode()).hexdigest()[:32]
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class SignupIPThrottle(LoginIPThrottle):
+    scope = "signup_ip"
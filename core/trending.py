@@ -0,0 +1,98 @@
+# core/trending.py
+
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, PostLike, PostScore
+from .polymorphic import get_content_type
+from . import cursors
+
+
+# -------------------------------------------------------------------------
+# Trending scores
+# -------------------------------------------------------------------------
+# score = (likes * w_like + comments * w_comment + log1p(agent followers) * w_follow)
+#         / (age_hours + 2) ** gravity
+# Only posts younger than TRENDING_WINDOW are ranked, older scores are dropped.
+
+TRENDING_WINDOW = timedelta(hours=getattr(settings, "TRENDING_WINDOW_HOURS", 72))
+TRENDING_GRAVITY = getattr(settings, "TRENDING_GRAVITY", 1.5)
+TRENDING_WEIGHTS = getattr(settings, "TRENDING_WEIGHTS", {"like": 1.0, "comment": 2.0, "follow": 0.5})
+BATCH_SIZE = 1000
+
+
+def _counts(qs, key):
+    return dict(qs.values(key).annotate(n=Count("pk")).values_list(key, "n"))
+
+
+def compute_scores(now=None):
+    """
+    Vectorized score computation for every post in the trending window.
+    Returns (post_ids, fields, scores).
+    """
+    now = now or timezone.now()
+    since = now - TRENDING_WINDOW
+    posts = list(Post.objects.filter(created_at__gte=since)
+                 .values_list("id", "field", "agent_id", "created_at"))
+    if not posts:
+        return np.array([], dtype=np.int64), [], np.array([], dtype=np.float64)
+
+    likes = _counts(PostLike.objects.filter(post__created_at__gte=since), "post_id")
+    comments = _counts(Comment.objects.filter(post__created_at__gte=since), "post_id")
+    agent_ids = {p[2] for p in posts if p[2] is not None}
+    followers = _counts(
+        Follow.objects.filter(target_content_type=get_content_type("agent"), target_object_id__in=agent_ids),
+        "target_object_id",
+    )
+
+    post_ids = np.array([p[0] for p in posts], dtype=np.int64)
+    like_n = np.array([likes.get(p[0], 0) for p in posts], dtype=np.float64)
+    comment_n = np.array([comments.get(p[0], 0) for p in posts], dtype=np.float64)
+    follow_n = np.array([followers.get(p[2], 0) for p in posts], dtype=np.float64)
+    age_hours = np.array([(now - p[3]).total_seconds() / 3600 for p in posts], dtype=np.float64)
+
+    engagement = (TRENDING_WEIGHTS["like"] * like_n
+                  + TRENDING_WEIGHTS["comment"] * comment_n
+                  + TRENDING_WEIGHTS["follow"] * np.log1p(follow_n))
+    scores = engagement / np.power(age_hours.clip(min=0) + 2, TRENDING_GRAVITY)
+    return post_ids, [p[1] for p in posts], scores
+
+
+def recompute_trending_scores_job():
+    """
+    Cron entry point: upsert scores in batches and drop posts that left the window.
+    """
+    now = timezone.now()
+    post_ids, fields, scores = compute_scores(now)
+    rows = [PostScore(post_id=int(pid), field=f, score=float(s))
+            for pid, f, s in zip(post_ids, fields, scores)]
+    for i in range(0, len(rows), BATCH_SIZE):
+        PostScore.objects.bulk_create(
+            rows[i:i + BATCH_SIZE],
+            update_conflicts=True,
+            unique_fields=["post"],
+            update_fields=["field", "score", "updated_at"],
+        )
+    PostScore.objects.filter(post__created_at__lt=now - TRENDING_WINDOW).delete()
+    print(f"Trending scores updated for {len(rows)} posts")
+
+
+# -------------------------------------------------------------------------
+# Cursor helpers
+# -------------------------------------------------------------------------
+def encode_cursor(score, post_id):
+    return cursors.encode_cursor(repr(score), post_id)
+
+
+def after_cursor(qs, cursor):
+    """
+    Keyset filter for ordering by (-score, -post_id).
+    """
+    if not cursor:
+        return qs
+    score, post_id = cursors.decode_cursor(cursor, float, int)
+    return qs.filter(Q(score__lt=score) | Q(score=score, post_id__lt=post_id))
@@ -5,20 +5,52 @@ urlpatterns = [
     # Auth
     path("auth/signup/", views.SignupView.as_view()),
     path("auth/signin/", views.SigninView.as_view()),
+    path("auth/social/<str:provider>/", views.SocialSignupView.as_view()),
+    path("auth/refresh/", views.TokenRefreshView.as_view()),
+    path("auth/logout/", views.LogoutView.as_view()),
 
     # Agents
     path("agents/", views.AgentListView.as_view()),
+    path("agents/suggested/", views.SuggestedAgentsView.as_view()),
+    path("agents/<int:agent_id>/followers/", views.AgentFollowersView.as_view()),
 
     # Users
     path("users/", views.UserListView.as_view()),
+    path("users/presence/", views.UserPresenceView.as_view()),
     path("users/<int:user_id>/", views.UserDetailView.as_view()),
     path("users/<int:user_id>/followers/", views.UserFollowersView.as_view()),
+    path("users/<int:user_id>/following/", views.UserFollowingView.as_view()),
+    path("users/<int:user_id>/mutuals/", views.UserMutualFollowsView.as_view()),
+    path("follows/status/", views.FollowStatusView.as_view()),
 
     # Chats
     path("chats/<int:user_id>/", views.DiscussionListView.as_view()),
     path("chats/<int:sender_id>/<int:receiver_id>/", views.DiscussionChatView.as_view()),
+    path("chats/<int:sender_id>/agent/<int:agent_id>/", views.AgentDiscussionChatView.as_view()),
 
     # Posts
     path("posts/", views.PostListView.as_view()),
     path("posts/<int:post_id>/comments/", views.PostCommentsView.as_view()),
+    path("comments/<int:comment_id>/replies/", views.CommentRepliesView.as_view()),
+
+    # Stories
+    path("stories/", views.StoryFeedView.as_view()),
+    path("stories/<str:owner_type>/<int:owner_id>/", views.OwnerStoriesView.as_view()),
+
+    # Async read endpoints (same responses as their sync counterparts)
+    path("async/posts/", views.AsyncPostListView.as_view()),
+    path("async/posts/<int:post_id>/comments/", views.AsyncPostCommentsView.as_view()),
+    path("async/chats/<int:user_id>/", views.AsyncDiscussionListView.as_view()),
+    path("async/chats/<int:sender_id>/<int:receiver_id>/", views.AsyncDiscussionChatView.as_view()),
+    path("async/chats/<int:sender_id>/agent/<int:agent_id>/", views.AsyncAgentDiscussionChatView.as_view()),
+    # Async auth endpoints, passwords are hashed off the request thread
+    path("async/auth/signin/", views.AsyncSigninView.as_view()),
+    path("async/auth/signup/", views.AsyncSignupView.as_view()),
+    path("async/auth/social/<str:provider>/", views.AsyncSocialSignupView.as_view()),
+
+    # Exports
+    path("exports/<str:name>/", views.ExportView.as_view()),
+
+    # Monitoring
+    path("metrics/generation/", views.GenerationMetricsView.as_view()),
 ]
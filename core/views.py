@@ -1,9 +1,35 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+import asyncio
+import json
+import math
+import weakref
 
-from . import services
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import exports, identity, services, telemetry
+from .routers import acting_user
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, SignupIPThrottle
+
+
+def _page_size(params, default=20, limit=100):
+    """
+    page_size query parameter clamped to 1..limit, ValueError if not an integer.
+    """
+    return max(1, min(int(params.get("page_size", default)), limit))
 
 
 # -------------------------------------------------------------------------
@@ -11,6 +37,7 @@ from . import services
 # -------------------------------------------------------------------------
 class SignupView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [SignupIPThrottle]
 
     def post(self, request):
         data = request.data
@@ -27,6 +54,7 @@ class SignupView(APIView):
 
 class SigninView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     def post(self, request):
         data = request.data
@@ -37,6 +65,47 @@ class SigninView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
 
+class SocialSignupView(APIView):
+    permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle]
+
+    def post(self, request, provider):
+        try:
+            tokens = services.social_signup(provider, request.data["token"])
+            return Response({"access": tokens.access_token, "refresh": tokens.refresh_token})
+        except NotImplementedError as e:
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except KeyError as e:
+            return Response({"error": f"missing field {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            # the provider's name is already taken by another account
+            return Response({"error": "Username already exists"}, status=status.HTTP_400_BAD_REQUEST)
+        except identity.IdentityError as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+class TokenRefreshView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        try:
+            tokens = services.refresh_access_token(request.data["refresh"])
+            return Response({"access": tokens.access_token, "refresh": tokens.refresh_token})
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            services.logout(request.user, request.data["refresh"])
+            return Response(status=status.HTTP_205_RESET_CONTENT)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 # -------------------------------------------------------------------------
 # Agent Controllers
 # -------------------------------------------------------------------------
@@ -62,6 +131,17 @@ class AgentListView(APIView):
         return Response(agent, status=status.HTTP_201_CREATED)
 
 
+class SuggestedAgentsView(APIView):
+    def get(self, request):
+        try:
+            k = int(request.query_params.get("k", 10))
+        except ValueError:
+            return Response({"error": "k must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        k = max(1, min(k, 50))
+        agents = services.get_suggested_agents(request.user.id, k)
+        return Response(agents)
+
+
 # -------------------------------------------------------------------------
 # User Controllers
 # -------------------------------------------------------------------------
@@ -81,12 +161,57 @@ class UserDetailView(APIView):
         return Response(user)
 
 
+class UserPresenceView(APIView):
+    def get(self, request):
+        try:
+            ids = [int(i) for i in request.query_params.get("ids", "").split(",") if i]
+        except ValueError:
+            return Response({"error": "ids must be a comma separated list of integers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(services.get_presence(ids[:200]))
+
+
 class UserFollowersView(APIView):
     def get(self, request, user_id):
         page_size = request.query_params.get("page_size", 10)
         page_index = request.query_params.get("page_index", 1)
         followers = services.get_followers(user_id, page_size, page_index)
-        return Response(followers)
+        return Response(followers, headers={"X-Total-Count": str(services.get_follower_count(user_id))})
+
+
+class UserFollowingView(APIView):
+    def get(self, request, user_id):
+        page_size = request.query_params.get("page_size", 10)
+        page_index = request.query_params.get("page_index", 1)
+        following = services.get_following(user_id, page_size, page_index)
+        return Response(following)
+
+
+class UserMutualFollowsView(APIView):
+    def get(self, request, user_id):
+        page_size = request.query_params.get("page_size", 10)
+        page_index = request.query_params.get("page_index", 1)
+        mutuals = services.get_mutual_follows(user_id, page_size, page_index)
+        return Response(mutuals)
+
+
+class AgentFollowersView(APIView):
+    def get(self, request, agent_id):
+        page_size = request.query_params.get("page_size", 10)
+        page_index = request.query_params.get("page_index", 1)
+        followers = services.get_followers(agent_id, page_size, page_index, target_type="agent")
+        return Response(followers, headers={"X-Total-Count": str(services.get_follower_count(agent_id, "agent"))})
+
+
+class FollowStatusView(APIView):
+    def post(self, request):
+        # body: {"targets": [{"type": "user|agent", "id": N}, ...]}
+        try:
+            targets = [(t["type"], t["id"]) for t in request.data.get("targets", [])]
+            status_map = services.get_follow_status(request.user.id, targets)
+        except (KeyError, TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response([{"type": t, "id": i, "following": f} for (t, i), f in status_map.items()])
 
 
 # -------------------------------------------------------------------------
@@ -104,6 +229,12 @@ class DiscussionChatView(APIView):
         return Response(chats)
 
 
+class AgentDiscussionChatView(APIView):
+    def get(self, request, sender_id, agent_id):
+        chats = services.get_discussion_chats(sender_id, agent_id, receiver_type="agent")
+        return Response(chats)
+
+
 # -------------------------------------------------------------------------
 # Post Controllers
 # -------------------------------------------------------------------------
@@ -112,6 +243,12 @@ class PostListView(APIView):
         category = request.query_params.get("field")
         page_size = request.query_params.get("page_size", 20)
         page_index = request.query_params.get("page_index", 1)
+        if request.query_params.get("sort") == "trending":
+            try:
+                posts = services.get_trending_posts(page_size, request.query_params.get("cursor"), category)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(posts)
         sort_date_up = request.query_params.get("sort_date_up", "false").lower() == "true"
         posts = services.get_posts(page_size, page_index, category, sort_date_up)
         return Response(posts)
@@ -119,7 +256,309 @@ class PostListView(APIView):
 
 class PostCommentsView(APIView):
     def get(self, request, post_id):
-        comments = services.get_post_comments(post_id)
+        try:
+            page_size = _page_size(request.query_params)
+            comments = services.get_post_comments(post_id, page_size, request.query_params.get("cursor"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(comments)
 
+    def post(self, request, post_id):
+        data = request.data
+        try:
+            comment = services.add_comment(
+                post_id=post_id,
+                sender_type="user",
+                sender_id=request.user.id,
+                text=data["text"],
+                parent_id=data.get("parent"),
+            )
+        except KeyError as e:
+            return Response({"error": f"missing field {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        except ObjectDoesNotExist:
+            return Response({"error": "Post or parent comment not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(comment, status=status.HTTP_201_CREATED)
+
+
+class CommentRepliesView(APIView):
+    def get(self, request, comment_id):
+        try:
+            page_size = _page_size(request.query_params)
+            replies = services.get_comment_replies(comment_id, page_size, request.query_params.get("cursor"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(replies)
+
+
+# -------------------------------------------------------------------------
+# Story Controllers
+# -------------------------------------------------------------------------
+class StoryFeedView(APIView):
+    def get(self, request):
+        stories = services.get_feed_stories(request.user.id)
+        return Response(stories)
+
+    def post(self, request):
+        data = request.data
+        try:
+            story = services.add_story(
+                owner_type="user",
+                owner_id=request.user.id,
+                content=data["content"],
+                story_type=data.get("type", "TXT"),
+            )
+        except KeyError as e:
+            return Response({"error": f"missing field {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(story, status=status.HTTP_201_CREATED)
+
+
+class OwnerStoriesView(APIView):
+    def get(self, request, owner_type, owner_id):
+        try:
+            stories = services.get_owner_stories(owner_type, owner_id)
+        except KeyError:
+            return Response({"error": "Unknown owner type"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(stories)
+
+
+# -------------------------------------------------------------------------
+# Async read Controllers
+# -------------------------------------------------------------------------
+# Async counterparts of the feed and chat history endpoints, served under
+# async/. DRF views are sync only, these are plain Django async views: the
+# access token is validated without loading the user, data comes from the
+# async ORM, and at most ASYNC_VIEW_CONCURRENCY requests per event loop run
+# at once. Requests that wait longer than ASYNC_VIEW_QUEUE_TIMEOUT get a 503.
+
+ASYNC_VIEW_CONCURRENCY = getattr(settings, "ASYNC_VIEW_CONCURRENCY", 64)
+ASYNC_VIEW_QUEUE_TIMEOUT = getattr(settings, "ASYNC_VIEW_QUEUE_TIMEOUT", 5)
+
+_async_view_slots = weakref.WeakKeyDictionary()
+
+
+def _view_slots():
+    loop = asyncio.get_running_loop()
+    slots = _async_view_slots.get(loop)
+    if slots is None:
+        slots = _async_view_slots[loop] = asyncio.Semaphore(ASYNC_VIEW_CONCURRENCY)
+    return slots
+
+
+def _token_user_id(request):
+    scheme, _, raw = request.headers.get("Authorization", "").partition(" ")
+    if scheme not in jwt_settings.AUTH_HEADER_TYPES or not raw:
+        return None
+    try:
+        return AccessToken(raw).get(jwt_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+
+class AsyncReadView(View):
+    http_method_names = ["get"]
+
+    async def dispatch(self, request, *args, **kwargs):
+        user_id = _token_user_id(request)
+        if user_id is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."},
+                                status=status.HTTP_401_UNAUTHORIZED)
+        slots = _view_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), ASYNC_VIEW_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return JsonResponse({"error": "Server busy"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        try:
+            with acting_user(user_id):
+                return await super().dispatch(request, *args, **kwargs)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        finally:
+            slots.release()
+
+
+class AsyncPostListView(AsyncReadView):
+    async def get(self, request):
+        params = request.GET
+        page_size = _page_size(params)
+        if params.get("sort") == "trending":
+            # keyset page over PostScore, a couple of indexed queries
+            posts = await sync_to_async(services.get_trending_posts)(
+                page_size, params.get("cursor"), params.get("field"),
+            )
+            return JsonResponse(posts)
+        posts = await services.aget_posts(
+            page_size, params.get("page_index", 1), params.get("field"),
+            params.get("sort_date_up", "false").lower() == "true",
+        )
+        return JsonResponse(posts, safe=False)
+
+
+class AsyncPostCommentsView(AsyncReadView):
+    async def get(self, request, post_id):
+        page_size = _page_size(request.GET)
+        comments = await services.aget_post_comments(post_id, page_size, request.GET.get("cursor"))
+        return JsonResponse(comments)
+
+
+class AsyncDiscussionListView(AsyncReadView):
+    async def get(self, request, user_id):
+        return JsonResponse(await services.aget_discussions(user_id), safe=False)
+
+
+class AsyncDiscussionChatView(AsyncReadView):
+    async def get(self, request, sender_id, receiver_id):
+        return JsonResponse(await services.aget_discussion_chats(sender_id, receiver_id), safe=False)
+
+
+class AsyncAgentDiscussionChatView(AsyncReadView):
+    async def get(self, request, sender_id, agent_id):
+        chats = await services.aget_discussion_chats(sender_id, agent_id, receiver_type="agent")
+        return JsonResponse(chats, safe=False)
+
+
+# -------------------------------------------------------------------------
+# Async auth Controllers
+# -------------------------------------------------------------------------
+# Under ASGI every sync view runs on one thread-sensitive thread, so the sync
+# signin/signup views hash one password at a time. These async views hash on
+# services' auth pool instead and apply the same throttles before any hashing.
+# Social sign-in awaits the provider on the pooled async HTTP client.
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAuthView(View):
+    http_method_names = ["post"]
+    throttle_classes = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.data = json.loads(request.body or b"{}")
+        except ValueError:
+            request.data = None
+        if not isinstance(request.data, dict):
+            return JsonResponse({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+        wait = await sync_to_async(self.throttle_wait)(request)
+        if wait is not None:
+            return JsonResponse({"detail": "Request was throttled."}, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                                headers={"Retry-After": str(wait)})
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except KeyError as e:
+            return JsonResponse({"error": f"missing field {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    def throttle_wait(self, request):
+        """
+        Seconds to wait when a throttle rejects the request, None otherwise.
+        Like DRF, every throttle records the attempt.
+        """
+        throttles = [throttle() for throttle in self.throttle_classes]
+        waits = [t.wait() for t in throttles if not t.allow_request(request, self)]
+        if not waits:
+            return None
+        return math.ceil(max((w for w in waits if w is not None), default=0))
+
+
+class AsyncSigninView(AsyncAuthView):
+    throttle_classes = (LoginIPThrottle, LoginUsernameThrottle)
+
+    async def post(self, request):
+        try:
+            tokens = await services.asignin(request.data["username"], request.data["password"])
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        return JsonResponse({"access": tokens.access_token, "refresh": tokens.refresh_token})
+
+
+class AsyncSignupView(AsyncAuthView):
+    throttle_classes = (SignupIPThrottle,)
+
+    async def post(self, request):
+        data = request.data
+        try:
+            tokens = await services.asignup(data["username"], data["email"], data["password"])
+        except (ValueError, IntegrityError) as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return JsonResponse({"access": tokens.access_token, "refresh": tokens.refresh_token})
+
+
+class AsyncSocialSignupView(AsyncAuthView):
+    throttle_classes = (LoginIPThrottle,)
+
+    async def post(self, request, provider):
+        try:
+            tokens = await services.asocial_signup(provider, request.data["token"])
+        except NotImplementedError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except IntegrityError:
+            return JsonResponse({"error": "Username already exists"}, status=status.HTTP_400_BAD_REQUEST)
+        except identity.IdentityError as e:
+            return JsonResponse({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        return JsonResponse({"access": tokens.access_token, "refresh": tokens.refresh_token})
+
+
+# -------------------------------------------------------------------------
+# Export Controllers
+# -------------------------------------------------------------------------
+class ExportView(APIView):
+    """
+    Stream a whole table as NDJSON (?compress=gzip for a gzip-encoded body).
+    Resume an interrupted download with ?after=<id of the last line received>.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        if name not in exports.EXPORTS:
+            return Response({"error": "Unknown export"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            after_id, until_id = exports.export_bounds(name, request.query_params.get("after", 0))
+        except ValueError:
+            return Response({"error": "after must be an id"}, status=status.HTTP_400_BAD_REQUEST)
+
+        compress = request.query_params.get("compress") == "gzip"
+        chunks = exports.iter_ndjson(name, after_id, until_id)
+        if compress:
+            chunks = exports.gzip_chunks(chunks)
+        body = (data for _, data in chunks)
+        if isinstance(request._request, ASGIRequest):
+            body = exports.astream(body)
+
+        response = StreamingHttpResponse(body, content_type="application/x-ndjson")
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        response["X-Export-After"] = str(after_id)
+        response["X-Export-Until"] = str(until_id)
+        response["Content-Disposition"] = f'attachment; filename="{name}-{after_id}-{until_id}.ndjson"'
+        return response
+
+
+# -------------------------------------------------------------------------
+# Monitoring Controllers
+# -------------------------------------------------------------------------
+class GenerationMetricsView(APIView):
+    """
+    Prometheus text exposition of LLM/image generation telemetry. Requires
+    "Authorization: Bearer <METRICS_TOKEN>" when the token is set, an admin
+    user otherwise.
+    """
+
+    def get_authenticators(self):
+        # the scraper's bearer token is not a JWT
+        if getattr(settings, "METRICS_TOKEN", ""):
+            return []
+        return super().get_authenticators()
+
+    def get_permissions(self):
+        if getattr(settings, "METRICS_TOKEN", ""):
+            return [AllowAny()]
+        return [IsAdminUser()]
+
+    def get(self, request):
+        token = getattr(settings, "METRICS_TOKEN", "")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return Response({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        return HttpResponse(telemetry.prometheus_metrics(), content_type="text/plain; version=0.0.4")
+
 
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 from django.conf import settings
 from django.conf.urls.static import static
@@ -42,12 +44,12 @@ INSTALLED_APPS = [
 'rest_framework',
 'rest_framework.authtoken', # dj-rest-auth
 'django_filters',
-'rest_framework_simplejwt',
+'rest_framework_simplejwt', # revocation lives in core.revocation, not token_blacklist
 'allauth', 'allauth.account', 'allauth.socialaccount',
 'allauth.socialaccount.providers.google', # Example provider
 'dj_rest_auth',
 'dj_rest_auth.registration',
-"channels"
+"channels",
 
 
 # Local apps
@@ -68,6 +70,12 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",  # default: protect all endpoints
     ),
 'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+# core.throttling: checked before any password is hashed
+'DEFAULT_THROTTLE_RATES': {
+    'login_ip': os.environ.get('LOGIN_IP_RATE', '30/min'),
+    'login_username': os.environ.get('LOGIN_USERNAME_RATE', '10/min'),
+    'signup_ip': os.environ.get('SIGNUP_IP_RATE', '20/hour'),
+},
 }
 
 
@@ -76,10 +84,32 @@ from datetime import timedelta
 SIMPLE_JWT = {
 'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
 'REFRESH_TOKEN_LIFETIME': timedelta(days=14),
-'ROTATE_REFRESH_TOKENS': False,
+'ROTATE_REFRESH_TOKENS': True,
 'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Social sign-in providers (see core/identity.py). SOCIAL_STUB_URL registers a
+# "stub" provider backed by a local server (manage.py social_stub_server).
+SOCIAL_PROVIDERS = {
+    'google': {
+        'class': 'core.identity.OAuthProvider',
+        'userinfo_url': 'https://www.googleapis.com/oauth2/v3/userinfo',
+    },
+}
+SOCIAL_STUB_URL = os.environ.get('SOCIAL_STUB_URL')
+if SOCIAL_STUB_URL:
+    SOCIAL_PROVIDERS['stub'] = {'class': 'core.identity.OAuthProvider', 'userinfo_url': SOCIAL_STUB_URL}
+SOCIAL_HTTP_TIMEOUT = 5.0
+SOCIAL_HTTP_MAX_CONNECTIONS = 20
+SOCIAL_IDENTITY_CACHE_TTL = 300
+SOCIAL_USER_CACHE_TTL = 24 * 3600  # provider subject -> user id
+
+# core.revocation: per-process Bloom filter in front of the RevokedToken table
+REVOCATION_BLOOM_CAPACITY = 100000
+REVOCATION_BLOOM_ERROR_RATE = 0.001
+REVOCATION_SYNC_SECONDS = 5
+REVOCATION_REBUILD_SECONDS = 3600
+
 
 # Media (if you store uploaded files locally)
 MEDIA_URL = "/media/"
@@ -99,8 +129,38 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.routers.ReplicaPinningMiddleware',
+    'core.middleware.RequestProfilingMiddleware',
 ]
 
+# NDJSON exports (core/exports.py): rows per DB fetch and per streamed chunk
+EXPORT_CHUNK_SIZE = 2000
+
+# Async read views (core/views.py): concurrent requests per worker event loop
+# and how long a request may wait for a slot before getting a 503
+ASYNC_VIEW_CONCURRENCY = int(os.environ.get('ASYNC_VIEW_CONCURRENCY', 64))
+ASYNC_VIEW_QUEUE_TIMEOUT = 5
+
+# Request profiling (core/middleware.py), off unless PROFILING_ENABLED=1
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '') == '1'
+PROFILING_PATHS = ('/',)
+PROFILING_SLOW_MS = 500
+PROFILING_MAX_QUERIES = 30
+# requests carrying "X-Profile: <token>" are run under cProfile
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')
+PROFILING_DIR = BASE_DIR / 'var' / 'profiles'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ai_net.profiling': {'handlers': ['console'], 'level': 'INFO' if PROFILING_ENABLED else 'WARNING'},
+    },
+}
+
 ROOT_URLCONF = 'ai_net.urls'
 
 TEMPLATES = [
@@ -119,21 +179,156 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'ai_net.wsgi.application'
+ASGI_APPLICATION = 'ai_net.asgi.application'
+
+
+# Channel layers
+# CHANNEL_LAYER=memory|redis (default: memory). The in-memory layer only
+# reaches sockets of the same process; use redis (or any Redis-protocol
+# server on CHANNEL_REDIS_URL) when running several ASGI workers.
+CHANNEL_LAYER = os.environ.get('CHANNEL_LAYER', 'memory')
+
+CHANNEL_LAYER_PROFILES = {
+    'memory': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        'CONFIG': {
+            'capacity': 1000,
+            'expiry': 60,
+        },
+    },
+    'redis': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [os.environ.get('CHANNEL_REDIS_URL', 'redis://127.0.0.1:6379/2')],
+            'prefix': 'ai_net',
+            'capacity': 1500,
+            'expiry': 10,
+            'group_expiry': 86400,
+        },
+    },
+}
+
+CHANNEL_LAYERS = {
+    'default': CHANNEL_LAYER_PROFILES[CHANNEL_LAYER],
+}
+
+# Chat presence (core/presence.py) and read receipt coalescing (core/consumers.py)
+PRESENCE_TTL = 60
+PRESENCE_HEARTBEAT_INTERVAL = 25
+READ_RECEIPT_FLUSH_DELAY = 1.0
+# Sockets opened with ?batch=1 get events coalesced over this window (seconds)
+CHAT_BATCH_WINDOW = 0.005
+CHAT_BATCH_MAX = 50
+
+# Agent chat (core/llm.py): "fake" streams canned replies without credentials
+AGENT_CHAT_MODEL = os.environ.get('AGENT_CHAT_MODEL', 'gemini-2.5-flash')
+AGENT_CHAT_TEMPERATURE = 0.7
+AGENT_CHAT_MAX_CONCURRENCY = 4
+# Context window (core/context.py): recent messages sent verbatim, older ones
+# are folded into a cached summary SUMMARY_BATCH at a time
+AGENT_CHAT_HISTORY = 20
+AGENT_CHAT_SUMMARY_BATCH = 20
+AGENT_CHAT_MESSAGE_MAX_CHARS = 2000
+AGENT_CHAT_SUMMARY_MAX_WORDS = 250
+
+# Agent comment replies (core/replies.py)
+AGENT_REPLY_BATCH = 8                    # comments answered per model call
+AGENT_REPLY_PARALLELISM = 4              # concurrent model calls per run
+AGENT_REPLY_PER_HOUR = 60
+AGENT_REPLY_PER_POST_PER_HOUR = 10
+AGENT_REPLY_MAX_AGE = 6 * 3600           # seconds before a queued comment is dropped
 
 
 CRONJOBS = [
-    ('0 0 * * *', 'core.cron.post_upload_job')
+    ('*/5 * * * *', 'core.cron.post_std_agent_job'),
+    ('*/10 * * * *', 'core.recommendations.refresh_recommendations_job'),
+    ('30 3 * * *', 'core.recommendations.refresh_recommendations_job', [], {'full': True}),
+    ('*/5 * * * *', 'core.trending.recompute_trending_scores_job'),
+    ('*/15 * * * *', 'core.services.purge_expired_stories'),
+    ('* * * * *', 'core.replies.process_agent_reply_queue'),
+    ('15 4 * * *', 'core.revocation.purge_expired'),
 ]
 
+# Stories expire this many hours after creation
+STORY_TTL_HOURS = 24
+
+# Agent posting planner (core/planner.py, core/cron.py)
+AGENT_POST_BATCH_SIZE = 50
+AGENT_POST_PARALLELISM = 4
+AGENT_POST_MAX_BATCHES = 10
+
+# Generation telemetry (core/telemetry.py), exposed at /metrics/generation/
+TELEMETRY_FLUSH_SIZE = 50
+TELEMETRY_FLUSH_INTERVAL = 30
+# Bearer token for the Prometheus scraper; when unset only admin users can read the metrics
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Agent recommendations (see core/recommendations.py)
+RECOMMENDER_MATRIX_PATH = BASE_DIR / 'var' / 'recommender.npz'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Select with DB_PROFILE=sqlite|postgres (default: sqlite)
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+
+# Seconds a SQLite writer waits for the write lock before "database is locked".
+# The driver's timeout is the only busy timeout, SQLITE_PRAGMAS must not set one.
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 20))
+
+DATABASE_PROFILES = {
+    # WAL/synchronous/mmap PRAGMAs are applied per connection in core.db
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            # take the write lock up front instead of failing on upgrade
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    'postgres': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'ai_net'),
+        'USER': os.environ.get('POSTGRES_USER', 'ai_net'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 300)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': 5,
+        },
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DB_PROFILE],
+}
+
+# Read replicas: DB_REPLICAS is a comma separated list of replica hosts
+# (postgres) or file paths (sqlite). Aliases are replica_0, replica_1, ...
+# Only @read_replica service calls are routed there, see core/routers.py.
+DATABASE_REPLICAS = []
+for i, location in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(','))):
+    replica = dict(DATABASES['default'])
+    replica['NAME' if DB_PROFILE == 'sqlite' else 'HOST'] = location.strip()
+    replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica_{i}'] = replica
+    DATABASE_REPLICAS.append(f'replica_{i}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds a user's reads stay on `default` after one of their writes
+REPLICA_STICKY_SECONDS = 5
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
 }
 
 urlpatterns = [
@@ -143,6 +338,40 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+# Caches
+# CACHE_BACKEND=locmem|file|redis (default: locmem). locmem is per process,
+# use file or redis when several workers must share cached values.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+CACHE_PROFILES = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ai_net',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'var' / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_PROFILES[CACHE_BACKEND],
+        'KEY_PREFIX': 'ai_net',
+        'TIMEOUT': 300,
+    },
+}
+
+# core.caching: cache alias used by @cached_service and how long a miss may hold the compute lock
+SERVICE_CACHE_ALIAS = 'default'
+SERVICE_CACHE_LOCK_TIMEOUT = 10
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -162,6 +391,42 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing (see core/hashers.py)
+# PASSWORD_HASHER_PROFILE=argon2|pbkdf2 (default: argon2 when argon2-cffi is
+# installed). The first hasher signs new passwords; the others still verify
+# existing hashes, which are upgraded on the user's next login.
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'argon2' if find_spec('argon2') else 'pbkdf2')
+
+PASSWORD_HASHER_PROFILES = {
+    'argon2': [
+        'core.hashers.TunedArgon2PasswordHasher',
+        'core.hashers.TunedPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ],
+    'pbkdf2': [
+        'core.hashers.TunedPBKDF2PasswordHasher',
+        'core.hashers.TunedArgon2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ],
+}
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]
+
+# Argon2id at the OWASP baseline (19 MiB, 2 passes, 1 lane) instead of
+# Django's 100 MiB / 8 lanes, which caps concurrent logins per core.
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+# PBKDF2-SHA256 at OWASP's 600k iterations (Django 5.2 defaults to 1M)
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 600000))
+
+# Threads that hash passwords for the async/auth/ views (default: one per CPU)
+AUTH_HASH_WORKERS = int(os.environ.get('AUTH_HASH_WORKERS', 0)) or None
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 